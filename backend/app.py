@@ -1,13 +1,26 @@
 #hreads in this project  Uploaded pdf,Legal🏛️Psychiatrist🧠,Dermatology🩺
 
-from fastapi import FastAPI,HTTPException,UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI,HTTPException,UploadFile,Query,Request,Response
+from fastapi.responses import JSONResponse,StreamingResponse,PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel,Field
 from typing import Optional
 import os,sys
+import json
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.concurrency import run_in_threadpool,iterate_in_threadpool
 from langchain_core.messages import HumanMessage,AIMessage
-from src.agent.agentic_workflow import GraphBuilder
+from src.agent.agentic_workflow import GraphBuilder,nodes
+from src.agent.answer_cache import ANSWER_CACHE_ENABLED
+from src.retrieval.router import ROUTER_ENABLED
+from src.retrieval.batch import BATCH_LLM_CONCURRENCY
+from src.observability.metrics import REGISTRY
+from src.observability.tracing import start_trace
+from src.ingestion.jobs import CANCELLED,FAILED,IngestionCancelled
+from src.vectorstore.chunk_store import INDEX_FILE
 
 import shutil  #It is mainly used for copying, moving, archiving, and deleting files or directories.  better than OS module
 from pathlib import Path
@@ -35,10 +48,31 @@ class QueryRequest(BaseModel):
     thread_id:str
     vectorstore_path: Optional[str] = None
     documents_path: Optional[str] = None
+    use_answer_cache: Optional[bool] = None   # None -> ANSWER_CACHE_ENABLED env default
+    latency_budget_ms: Optional[float] = None   # staged retrieval budget, None -> RETRIEVAL_BUDGET_MS env default
+    include_timings: bool = False   # return the per node / model call timing breakdown with the answer
+    vectorstores: Optional[list[str]] = None   # extra knowledge bases (names or PDF thread ids) searched with thread_id's store
+    auto_route: Optional[bool] = None   # query router picks depth / no retrieval, None -> ROUTER_ENABLED env default (off)
+                                        # only an explicit True also lets it pick among the predefined knowledge bases
 
 class QueryResponse(BaseModel):
     answer:str
     thread_id:str
+    retrieval_stages: list[dict] = []   # stages taken by staged retrieval (empty for the full chain / cache hits)
+    trace_id: Optional[str] = None
+    route: dict = {}                    # query router decision (empty when routing is off / cache hits)
+    timings: Optional[dict] = None      # only with include_timings
+
+class BatchItem(BaseModel):
+    query:str
+    thread_id: Optional[str] = None          # a predefined knowledge base or an uploaded PDF thread
+    vectorstore_path: Optional[str] = None   # or the store itself (must be a known store)
+    id: Optional[str] = None                 # echoed back, to match results that arrive out of order
+
+class BatchQueryRequest(BaseModel):
+    items: list[BatchItem]
+    llm_concurrency: Optional[int] = Field(None,ge=1,le=64)    # None -> BATCH_LLM_CONCURRENCY env default
+    rerank_concurrency: Optional[int] = Field(None,ge=1,le=64)
 
 class ChatMessage(BaseModel):
     role:str
@@ -46,6 +80,9 @@ class ChatMessage(BaseModel):
 
 class ChatHistoryResponse(BaseModel):
     messages : list[ChatMessage]
+    total: int = 0                     # messages in the whole thread
+    start: int = 0                     # index of the first returned message in the thread
+    next_before: Optional[int] = None  # pass as before= to get the previous page, None when this page starts the thread
 
 
 #=============================================== Health Check EndPoint ======================================
@@ -58,9 +95,46 @@ async def root():
 graph = GraphBuilder()
 workflow = graph.build_graph()
 
+#====================================== Worker Pool for Graph Runs =============================================
+
+# workflow.invoke is blocking (LLM, rerank, embedding I/O) so it runs in its own sized pool instead of on the event loop.
+# Requests above QUERY_WORKERS wait in the queue, when the queue is full too we answer 503 instead of piling up.
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "8"))
+QUERY_QUEUE_SIZE = int(os.getenv("QUERY_QUEUE_SIZE", "32"))
+
+query_executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="graph_worker")
+query_slots = asyncio.Semaphore(QUERY_WORKERS + QUERY_QUEUE_SIZE)  # running + waiting requests
+
+
+def invoke_traced(input_data:dict,config:dict):
+    """workflow.invoke with a new trace current on the worker thread, returns (result, trace)"""
+    with start_trace(route="query") as trace:
+        result = workflow.invoke(input_data,config=config)
+    return result,trace
+
+
+async def run_graph(input_data:dict,config:dict):
+    """Run the graph in the worker pool without blocking the event loop, returns (result, trace)"""
+    if query_slots.locked():
+        raise HTTPException(status_code=503, detail="Server is busy, please try again")
+    async with query_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(query_executor, partial(invoke_traced, input_data, config))
+
+
+@app.on_event("shutdown")
+async def shutdown_query_executor():
+    query_executor.shutdown(wait=False, cancel_futures=True)
+
 #====================================== Dict to Store Uploaded PDF path =======================================
 
 uploaded_pdfs_store = {}  # {"PDF_my_resume": "./temp_pdfs/PDF_my_resume.pdf"}
+
+
+def pdf_vectorstore_path(pdf_choice:str) -> str:
+    """Vectorstore folder of an uploaded PDF thread ("PDF_my_resume" -> "./Vectorstores/my_resume/")"""
+    filename_no_ext = pdf_choice.replace("PDF_", "", 1)
+    return f"./Vectorstores/{filename_no_ext}/"
  
 #===========================================Pre Defined Vector Store Path ===================================
  
@@ -69,6 +143,11 @@ VECTORSTORE_PATHS = {
     "Psychiatrist🧠": "./vectorstores/psychiatrist",
     "Legal🏛️": "./vectorstores/Legal"
 }
+
+# load predefined vectorstores once at startup so the first query does not pay for disk I/O + unpickling
+@app.on_event("startup")
+async def preload_vectorstores():
+    nodes.store_cache.preload(VECTORSTORE_PATHS.values())
     
 #=========================================== Hanlde Uploaaded PDF ==============================================
 
@@ -97,19 +176,45 @@ async def upload_pdf(file: UploadFile): # #upload file is built in fast api vali
     pdf_choice = f"PDF_{filename_no_ext}"
     temp_pdf_path = temp_dir / f"PDF_{filename_no_ext}.pdf"
 
-    with open (temp_pdf_path,"wb") as f:
-        shutil.copyfileobj(file.file,f) #copy data chunk by chunk in to temp_pdf_path
+    def save_pdf():
+        with open (temp_pdf_path,"wb") as f:
+            shutil.copyfileobj(file.file,f) #copy data chunk by chunk in to temp_pdf_path
+    await run_in_threadpool(save_pdf)
 
     # Store in our tracking dictionary       [[we only store PDF path no vectorstore path is needed here]]
     uploaded_pdfs_store[pdf_choice] = str(temp_pdf_path)
 
+    # start building the vectorstore now so the first query does not have to
+    job = nodes.ingestion.submit(documents_path=str(temp_pdf_path),
+                                 vectorstore_path=pdf_vectorstore_path(pdf_choice))
+
     return {
         "message":"Pdf uploaded successfully",
         "pdf_choice":pdf_choice,
-        "filename":file.filename
+        "filename":file.filename,
+        "job_id":job.job_id
     }
 
 
+#=================================== Background Ingestion Status ==========================================
+@app.get("/ingest_status/{job_id}")
+async def ingest_status(job_id:str):
+    """Progress of a background ingestion job (pages parsed, chunks made, chunks embedded)"""
+    job = nodes.ingestion.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404,detail="Unknown ingestion job")
+    return job.to_dict()
+
+
+@app.post("/ingest_cancel/{job_id}")
+async def ingest_cancel(job_id:str):
+    """Cancel a running ingestion job, nothing is written to the vectorstore folder"""
+    job = nodes.ingestion.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404,detail="Unknown ingestion job")
+    return job.to_dict()
+
+
 #=================================== Get Vectorstore including pdf ==========================================
 @app.get("/vectorstores")
 async def get_vectorstores():
@@ -124,20 +229,20 @@ async def get_vectorstores():
 
 
 #====================================================hanle User Query for Both Scenerio =================
-@app.post("/query",response_model=QueryResponse)
-async def process_query(request:QueryRequest):
-    """This function let user chat with PDF + Vectorstores"""
+def build_graph_input(request:QueryRequest):
+    """Map the requested thread (uploaded PDF or predefined store) to the graph input"""
     thread_id = request.thread_id   # first we get thread(choice) which we want to send our query to
-    CONFIG = {"configurable":{"thread_id":thread_id}}
 
     # Handling PDF thread
     if thread_id.startswith("PDF_"):
-        filename_no_ext = thread_id.replace("PDF_", "")
         temp_pdf_path = uploaded_pdfs_store[thread_id]  # we will use thread id to access that specific pdf path from above [uploaded_pdf_store]
+        job = nodes.ingestion.find(pdf_vectorstore_path(thread_id))
+        if job is not None and job.status == CANCELLED:
+            raise HTTPException(status_code=409, detail=f"Ingestion of this PDF was cancelled (job {job.job_id}), upload it again")
         
         input_data = {
         "documents_path": temp_pdf_path,
-        "vectorstore_path": f"./Vectorstores/{filename_no_ext}/",
+        "vectorstore_path": pdf_vectorstore_path(thread_id),
         "query": request.query}
                     
     else:
@@ -145,24 +250,253 @@ async def process_query(request:QueryRequest):
             "vectorstore_path":VECTORSTORE_PATHS[thread_id],
             "query":request.query
         }
+    # always set it, otherwise the value of an earlier request stays in the thread checkpoint
+    input_data["use_answer_cache"] = ANSWER_CACHE_ENABLED if request.use_answer_cache is None else request.use_answer_cache
+    input_data["latency_budget_ms"] = request.latency_budget_ms or 0
+    input_data["vectorstore_paths"] = federated_paths(input_data["vectorstore_path"],request.vectorstores)
+    input_data["auto_route"] = ROUTER_ENABLED if request.auto_route is None else request.auto_route
+    # only when the caller asked for routing (and gave no stores) may the query go to another predefined knowledge base
+    route_stores = request.auto_route is True and not input_data["vectorstore_paths"]
+    input_data["route_candidates"] = list(dict.fromkeys([input_data["vectorstore_path"],*VECTORSTORE_PATHS.values()])) \
+        if route_stores else []
+    return input_data
+
+
+def check_store_ready(name:str,path:str):
+    """409 when an extra store of a federated query was cancelled / failed or never built (running builds are waited for)"""
+    job = nodes.ingestion.find(path)
+    if job is not None and job.status in (CANCELLED,FAILED):
+        raise HTTPException(status_code=409, detail=f"Ingestion of vectorstore {name} {job.status} (job {job.job_id}), upload it again")
+    if job is None and not os.path.exists(os.path.join(path,INDEX_FILE)):
+        raise HTTPException(status_code=409, detail=f"Vectorstore {name} has not been built")
+
+
+def federated_paths(primary:str,stores:Optional[list[str]]) -> list[str]:
+    """Stores of a federated query (primary first, no duplicates), [] when only the primary store is searched"""
+    paths = [primary]
+    for name in stores or []:
+        if name in VECTORSTORE_PATHS:
+            path = VECTORSTORE_PATHS[name]
+        elif name in uploaded_pdfs_store:
+            path = pdf_vectorstore_path(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown vectorstore: {name}")
+        if path not in paths:
+            check_store_ready(name,path)
+            paths.append(path)
+    return paths if len(paths)>1 else []
 
-    result = workflow.invoke(input_data,config=CONFIG)
+
+def ingestion_cancelled_detail(error:IngestionCancelled) -> str:
+    return f"Ingestion of this PDF was cancelled (job {error}), upload it again"
+
+
+@app.post("/query",response_model=QueryResponse)
+async def process_query(request:QueryRequest):
+    """This function let user chat with PDF + Vectorstores"""
+    thread_id = request.thread_id
+    CONFIG = {"configurable":{"thread_id":thread_id}}
+    input_data = build_graph_input(request)
+
+    try:
+        result,trace = await run_graph(input_data,config=CONFIG)
+    except IngestionCancelled as e:
+        # cancelled while this query was waiting for the build
+        raise HTTPException(status_code=409, detail=ingestion_cancelled_detail(e))
 
     if not result or "answer" not in result:
         raise HTTPException(status_code=500, detail="Failed to generate response")
+    graph.summarizer.schedule(thread_id)  # fold this turn into the thread summary in background
     return QueryResponse(
         answer=result["answer"],
-        thread_id=thread_id
+        thread_id=thread_id,
+        retrieval_stages=result.get("retrieval_stages") or [],
+        trace_id=trace.trace_id,
+        route=result.get("route") or {},
+        timings=trace.breakdown() if request.include_timings else None
     )
-        
+
+#==================================================== Streaming Query (SSE) ==================================
+
+def sse_event(event:str,data:dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/query/stream")
+async def stream_query(request:QueryRequest):
+    """Same as /query but streams the answer as Server-Sent Events
+
+    event: progress  -> {"node": "Retriever"}     a graph stage finished
+    event: token     -> {"content": "..."}        a piece of the answer from the LLM
+    event: done      -> {"answer": "...", "thread_id": "...", "retrieval_stages": [...], "route": {...}, "trace_id": "...",
+                         "timings": {...} only with include_timings}
+    event: error     -> {"detail": "...", "status_code": 409 | 500}  same codes as /query, last event of the stream
+    """
+    thread_id = request.thread_id
+    CONFIG = {"configurable":{"thread_id":thread_id}}
+    input_data = build_graph_input(request)
+
+    if query_slots.locked():
+        raise HTTPException(status_code=503, detail="Server is busy, please try again")
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    traces = []
+    stop = threading.Event()   # set when the client went away, the run stops at its next chunk
+
+    # runs in the worker pool, hands every stream chunk over to the event loop
+    def produce():
+        try:
+            with start_trace(route="query_stream") as trace:
+                traces.append(trace)
+                for mode,chunk in workflow.stream(input_data,config=CONFIG,stream_mode=["updates","messages"]):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(events.put_nowait,(mode,chunk))
+        except IngestionCancelled as e:
+            loop.call_soon_threadsafe(events.put_nowait,("error",{"detail":ingestion_cancelled_detail(e),"status_code":409}))
+        except Exception as e:
+            loop.call_soon_threadsafe(events.put_nowait,("error",{"detail":str(e),"status_code":500}))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait,None)
+
+    async def event_stream():
+        async with query_slots:
+            worker = loop.run_in_executor(query_executor,produce)
+            try:
+                answer = ""
+                stages = []
+                route = {}
+                while (item := await events.get()) is not None:
+                    mode,chunk = item
+                    if mode == "messages":
+                        message,metadata = chunk
+                        # only the answer LLM call is streamed (Agent marks it), not the summary LLM
+                        if metadata.get("stream_tokens") and message.content:
+                            yield sse_event("token",{"content":message.content})
+                    elif mode == "updates":
+                        for node,update in chunk.items():
+                            yield sse_event("progress",{"node":node})
+                            if isinstance(update,dict) and "answer" in update:
+                                answer = update["answer"]
+                            if isinstance(update,dict) and "retrieval_stages" in update:
+                                stages = update["retrieval_stages"]
+                            if isinstance(update,dict) and "route" in update:
+                                route = update["route"]
+                    else:
+                        yield sse_event("error",chunk)
+                        return
+                if not answer:
+                    yield sse_event("error",{"detail":"Failed to generate response","status_code":500})
+                    return
+            finally:
+                # client disconnect or error: the slot is only free again once the worker thread is done
+                stop.set()
+                await worker
+            graph.summarizer.schedule(thread_id)  # only turns that were answered
+            done = {"answer":answer,"thread_id":thread_id,"retrieval_stages":stages,"route":route,"trace_id":traces[0].trace_id}
+            if request.include_timings:
+                done["timings"] = traces[0].breakdown()
+            yield sse_event("done",done)
+
+    return StreamingResponse(event_stream(),media_type="text/event-stream",
+                             headers={"Cache-Control":"no-cache","X-Accel-Buffering":"no"})
+
+#==================================================== Batch Query (JSONL) ====================================
+
+def batch_vectorstore_path(item:BatchItem) -> str:
+    """Store of a batch item, only predefined stores and uploaded PDF stores are allowed"""
+    known = set(VECTORSTORE_PATHS.values()) | {pdf_vectorstore_path(thread) for thread in uploaded_pdfs_store}
+    if item.vectorstore_path:
+        if item.vectorstore_path not in known:
+            raise HTTPException(status_code=400, detail=f"Unknown vectorstore: {item.vectorstore_path}")
+        return item.vectorstore_path
+    if item.thread_id in VECTORSTORE_PATHS:
+        return VECTORSTORE_PATHS[item.thread_id]
+    if item.thread_id in uploaded_pdfs_store:
+        return pdf_vectorstore_path(item.thread_id)
+    raise HTTPException(status_code=400, detail=f"Item needs a known thread_id or vectorstore_path: {item.query[:50]}")
+
+
+@app.post("/query/batch")
+async def batch_query(request:BatchQueryRequest):
+    """Answer many questions in one call (evaluation sets), retrieval is batched per knowledge base.
+    Streams one JSON object per line as answers finish: {"index", "id", "query", "vectorstore_path", "answer", "sources"}
+    ("error" instead of answer / sources for items that failed). Items are stateless, thread history is not used or written.
+    """
+    items = [{"query":item.query,"id":item.id,"vectorstore_path":batch_vectorstore_path(item)} for item in request.items]
+    if query_slots.locked():
+        raise HTTPException(status_code=503, detail="Server is busy, please try again")
+    # the batch holds one query slot per concurrent LLM call, so /query and /query/stream share the same bound
+    slots = min(request.llm_concurrency or BATCH_LLM_CONCURRENCY,QUERY_WORKERS)
+
+    async def lines():
+        acquired = 0
+        try:
+            for _ in range(slots):
+                await query_slots.acquire()
+                acquired += 1
+            results = graph.batch_query(items,llm_concurrency=slots,rerank_concurrency=request.rerank_concurrency)
+            async for result in iterate_in_threadpool(results):
+                yield json.dumps(result) + "\n"
+        finally:
+            for _ in range(acquired):
+                query_slots.release()
+
+    return StreamingResponse(lines(),media_type="application/x-ndjson")
+
+#================================================ Metrics ====================================================
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms (nodes, model calls, checkpoint operations, whole runs) and LLM token counts, Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(),media_type="text/plain; version=0.0.4")
+
+#============================================ Answer Cache Stats =============================================
+@app.get("/answer_cache_stats")
+async def answer_cache_stats():
+    """Hit rate and size of the semantic answer cache per knowledge base"""
+    return nodes.answer_cache.stats()
+
+
+@app.get("/rerank_cache_stats")
+async def rerank_cache_stats():
+    """Hit rate of the rerank result cache and the active rerank backend"""
+    return nodes.reranker_model.stats()
+
+
+@app.get("/vectorstore_cache_stats")
+async def vectorstore_cache_stats():
+    """Loaded stores, memory used and hit rate of the vectorstore cache (also in /metrics)"""
+    return nodes.store_cache.stats()
+
+
+@app.get("/embedding_cache_stats")
+async def embedding_cache_stats():
+    """Hit rate of the embedding cache (also exported as embedding_cache_lookups_total in /metrics)"""
+    if not hasattr(nodes.embedding_model,"stats"):
+        return {"model":type(nodes.embedding_model).__name__,"cached":False}
+    return nodes.embedding_model.stats()
+
 #===========================================Load Past history from the DB ====================================
 
 #we load conversation for 1 chat(thread) at a time
-def load_conversation(thread_id:str):
+def load_conversation(thread_id:str,before:Optional[int]=None,after:Optional[int]=None,limit:Optional[int]=None):
+    """Messages [start, end) of a thread.
+    before=n -> the limit messages before index n (older pages), after=n -> messages from index n on (new ones only)
+    """
     state = workflow.get_state(config={"configurable":{"thread_id":thread_id}}) #Get Already store messages
     messages = state.values.get("messages",[])
+    total = len(messages)
+    if after is not None:
+        start = min(after,total)
+        end = total if limit is None else min(total,start+limit)
+    else:
+        end = total if before is None else min(before,total)
+        start = 0 if limit is None else max(0,end-limit)
+
     chat_messages = []
-    for message in messages:
+    for message in messages[start:end]:
         if isinstance(message,HumanMessage):
             role = "user"
         elif isinstance(message,AIMessage):
@@ -170,15 +504,34 @@ def load_conversation(thread_id:str):
         else:
             role="system"
         chat_messages.append(ChatMessage(role=role,content=message.content))
-    return chat_messages
+    return ChatHistoryResponse(messages=chat_messages,total=total,start=start,next_before=start if start>0 else None)
+
+
+def thread_etag(thread_id:str,before:Optional[int]=None,after:Optional[int]=None,limit:Optional[int]=None) -> str:
+    """Version of one page of a thread = its newest checkpoint id (changes with every turn and summary update)
+    + the pagination parameters, so a validator of one page never answers 304 for another page
+    """
+    checkpoint_id = graph.checkpointer.latest_checkpoint_id(thread_id)
+    return f'W/"{checkpoint_id or "empty"}:{before}:{after}:{limit}"'
 
 
 # load past history from DB
 @app.get("/chat_history/{thread_id}",response_model=ChatHistoryResponse)
-async def get_chat_history(thread_id:str):
-    """Get chat history for a specific chat from Database"""
-    messages = load_conversation(thread_id=thread_id)
-    return ChatHistoryResponse (messages = messages)
+async def get_chat_history(thread_id:str,request:Request,response:Response,
+                           before:Optional[int]=Query(None,ge=0),
+                           after:Optional[int]=Query(None,ge=0),
+                           limit:Optional[int]=Query(None,ge=1,le=1000)):
+    """Get chat history for a specific chat from Database, paginated with before / after + limit.
+
+    ETag is the version of this page (thread version + before / after / limit): a client that already holds the
+    page sends it back in If-None-Match and gets 304 without the checkpoint being loaded.
+    """
+    etag = await run_in_threadpool(thread_etag,thread_id,before,after,limit)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304,headers={"ETag":etag})
+    history = await run_in_threadpool(load_conversation,thread_id=thread_id,before=before,after=after,limit=limit)
+    response.headers["ETag"] = etag
+    return history
 
 
 #============================================ Audio File Hanlde =================================================
@@ -201,11 +554,13 @@ async def upload_audio(file:UploadFile):
     temp_dir.mkdir(exist_ok=True)
 
     temp_audio_path = temp_dir/file.filename
-    with open(temp_audio_path,"wb") as f:
-        shutil.copyfileobj(file.file,f)
+    def save_audio():
+        with open(temp_audio_path,"wb") as f:
+            shutil.copyfileobj(file.file,f)
+    await run_in_threadpool(save_audio)
     
-    # existing speech-to-text function
-    text = speech_to_text(str(temp_audio_path))
+    # existing speech-to-text function (blocking Groq call, keep it off the event loop)
+    text = await run_in_threadpool(speech_to_text,str(temp_audio_path))
 
     return JSONResponse(content={"transcription": text})
 
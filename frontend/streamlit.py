@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+import json
 from pathlib import Path
 from typing import Dict
 import os,sys
@@ -52,20 +53,79 @@ def upload_pdf_to_api(uploaded_file):
     return response
 
 
-def send_query_to_api(query:str,thread_id:str):
-    """SEnd query to ABckend"""
+# friendly labels for the progress events sent by /query/stream
+STAGE_LABELS = {
+    "Document_Loader": "📄 Reading PDF...",
+    "Text_Splitter": "✂️ Splitting into chunks...",
+    "Create_Vector_Store": "🧮 Building vectorstore...",
+    "Load_Vector_Store": "📚 Knowledge base loaded",
+    "Answer_Cache_Lookup": "🗂️ Checked for a cached answer",
+    "Query_Router": "🧭 Query routed",
+    "Retriever": "🔍 Relevant documents retrieved",
+    "Agent": "✅ Answer ready",
+}
+
+
+def send_query_to_api(query:str,thread_id:str,status=None):
+    """Send query to backend /query/stream and yield answer tokens as they arrive (Server-Sent Events)
+    status: optional st.status box, updated with the retrieval stage progress
+    """
     data = {"query":query,
             "thread_id":thread_id}
-    response = make_api_request(endpoint="/query",method="POST",data=data)
-    return response
+    url = f"{API_BASE_URL}/query/stream"
+    with requests.post(url,json=data,stream=True) as response:
+        if response.status_code != 200:
+            st.error(f"API error: {response.status_code}")
+            return
+        event = None
+        streamed = False
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                payload = json.loads(line[len("data:"):].strip())
+                if event == "token":
+                    streamed = True
+                    yield payload["content"]
+                elif event == "done" and not streamed and payload.get("answer"):
+                    # cached answers come back whole, without token events
+                    yield payload["answer"]
+                elif event == "progress" and status is not None:
+                    status.update(label=STAGE_LABELS.get(payload["node"],payload["node"]))
+                elif event == "error":
+                    st.error(payload.get("detail","Sorry i could not process your query"))
 
 
 def load_chat_history(thread_id:str):
-    """Load chat histroy from backend"""
-    response = make_api_request(f"chat_history/{thread_id}")
-    if response:
-        return response.get("messages",[])
-    return []
+    """Load chat histroy from backend.
+    Messages are cached per thread in session_state, every rerun only asks for messages after the cached ones
+    and sends the ETag of that same page so an unchanged thread costs a 304 instead of a full history load.
+    """
+    cache = st.session_state.setdefault("history_cache",{}).setdefault(thread_id,{"messages":[],"etag":None,"after":None})
+    # ETags are per page, only valid for the after= they were returned for
+    same_page = cache.get("after") == len(cache["messages"])
+    headers = {"If-None-Match":cache["etag"]} if cache["etag"] and same_page else {}
+    url = f"{API_BASE_URL}/chat_history/{thread_id}"
+    response = requests.get(url,params={"after":len(cache["messages"])},headers=headers)
+    if response.status_code == 304:
+        return cache["messages"]
+    if response.status_code != 200:
+        st.error(f"API error: {response.status_code}")
+        return cache["messages"]
+
+    data = response.json()
+    if data.get("total",0) < len(cache["messages"]):
+        # thread got shorter on the server (deleted / rewritten), start over with the full history
+        cache["messages"],cache["etag"],cache["after"] = [],None,None
+        return load_chat_history(thread_id)
+    new_messages = data.get("messages",[])
+    if not new_messages:
+        # nothing new: remember this page's ETag, the next rerun asks for the same page and gets a 304
+        cache["etag"],cache["after"] = response.headers.get("ETag"),len(cache["messages"])
+    else:
+        cache["messages"].extend(new_messages)
+        cache["etag"],cache["after"] = None,None
+    return cache["messages"]
 
 def convert_audio_to_text(audio_file_path: str, thread_id: str):
     """
@@ -287,12 +347,12 @@ if user_input:
     
     # Send query to API and get response
     with st.chat_message("assistant"):
-        with st.spinner("Thinking...."):
-            response = send_query_to_api(query=user_input,thread_id=thread_id)
+        status = st.status("Thinking....")
+        # tokens are rendered as soon as they arrive
+        answer = st.write_stream(send_query_to_api(query=user_input,thread_id=thread_id,status=status))
+        status.update(state="complete")
 
-        if response and "answer" in response:
-            st.markdown(response["answer"])
-        else:
+        if not answer:
             st.error("Sorry i could not process your query")
 
 # ========================================== Sidebar Additional Options ===================================
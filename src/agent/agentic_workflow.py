@@ -1,11 +1,13 @@
 
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
 from langgraph.graph import StateGraph,START,END
 import os
 
 from src.all_nodes.nodes import GraphNodes,AgenticRAG
-from src.agent.model_loader import summary_llm,reranker_llm,EMBEDDER
+from src.agent.model_loader import model,summary_llm,reranker_llm,EMBEDDER
+from src.agent.summary import ThreadSummarizer
+from src.agent.checkpoint_store import PooledSqliteSaver
+from src.observability.tracing import instrument_methods
+from src.retrieval.batch import BatchQueryRunner
 
 # this line for google embedding as it require running event loop
 # GoogleGenerativeAIEmbeddings internally initializes a gRPC async client.
@@ -33,14 +35,17 @@ google_api = os.getenv("GOOGLE_API_KEY")
 nodes = GraphNodes(embedding_model=EMBEDDER, # GoogleGenerativeAIEmbeddings
                    summary_llm=summary_llm,   # ChatOpenAI
                    reranker_model=reranker_llm) # CohereRerank
+# every node / helper call is timed (rag_stage_seconds in /metrics + per request trace)
+instrument_methods(nodes,kind="node")
 
 class GraphBuilder:
     def __init__(self):
-        db_path = os.path.abspath("./chat_hist/chat.db")
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        conn = sqlite3.connect(database=db_path, check_same_thread=False)
-        self.checkpointer = SqliteSaver(conn=conn)
+        # one WAL connection per worker thread + indexed threads table (CHECKPOINT_DB_PATH, default ./chat_hist/chat.db)
+        self.checkpointer = PooledSqliteSaver.from_path()
+        # checkpoint reads / writes are part of every request, time them like the nodes
+        instrument_methods(self.checkpointer,kind="checkpoint",names=["get_tuple","put","put_writes"],prefix="sqlite.")
         self.app = None
+        self.summarizer = None
 
 
     def build_graph(self):
@@ -50,6 +55,8 @@ class GraphBuilder:
         graph.add_node("Text_Splitter",nodes.Text_Splitter)
         graph.add_node("Create_Vector_Store",nodes.Create_Vector_Store)
         graph.add_node("Load_Vector_Store",nodes.Load_Vector_Store)  
+        graph.add_node("Answer_Cache_Lookup",nodes.Answer_Cache_Lookup)
+        graph.add_node("Query_Router",nodes.Query_Router)
         graph.add_node("Retriever",nodes.Retriever)
         graph.add_node("Agent",nodes.Agent)
         #Conditional Edge
@@ -59,22 +66,37 @@ class GraphBuilder:
         # If new Vectorstore
         graph.add_edge("Document_Loader","Text_Splitter")
         graph.add_edge("Text_Splitter","Create_Vector_Store")
-        graph.add_edge("Create_Vector_Store","Retriever")
+        graph.add_edge("Create_Vector_Store","Answer_Cache_Lookup")
 
         # if Loading VectorStore
-        graph.add_edge("Load_Vector_Store","Retriever")
+        graph.add_edge("Load_Vector_Store","Answer_Cache_Lookup")
+
+        # cached answer for a (semantically) repeated first question skips retrieval + LLM
+        graph.add_conditional_edges("Answer_Cache_Lookup",nodes.check_answer_cache,{"hit":END,
+                                                                                "miss":"Query_Router"})
+
+        # router picks stores + depth, chit-chat / follow-ups about the last answer go straight to the LLM
+        graph.add_conditional_edges("Query_Router",nodes.check_route,{"retrieve":"Retriever",
+                                                                   "skip":"Agent"})
 
         graph.add_edge("Retriever", "Agent")
         graph.add_edge("Agent", END)
 
         self.app = graph.compile(checkpointer=self.checkpointer)
+        # per thread conversation summary, updated after each answer off the request path
+        self.summarizer = ThreadSummarizer(app=self.app,summary_llm=summary_llm)
         return self.app
     
     def retrieve_all_thread(self):
-        all_thread = set()
-        for checkpoint in self.checkpointer.list(None):
-            all_thread.add(checkpoint.config["configurable"]["thread_id"])
-        return list(all_thread)
+        # read from the threads table, most recent conversation first
+        return self.checkpointer.list_threads()
+
+    def batch_query(self,items:list[dict],**options):
+        """Answer many independent questions ([{"query","vectorstore_path", optional "id"}]) with batched retrieval,
+        yields result dicts as they finish. options: llm_concurrency, rerank_concurrency, retrieval_size
+        """
+        options = {key:value for key,value in options.items() if value is not None}
+        yield from BatchQueryRunner(nodes=nodes,llm=model,**options).run(items)
 
     def __call__(self):  # __call__ == It lets an instance of your class be called like a function
         return self.build_graph()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from src.observability.metrics import REGISTRY
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+
+CACHE_LOOKUPS = REGISTRY.counter("answer_cache_lookups_total", "Semantic answer cache lookups by result (hit / miss)")
+
+# words that point back into the conversation, a question using them can need a different answer in another thread
+CONTEXT_REFERENCE = re.compile(
+    r"^\W*(and|but|so|also|then|what about|how about)\b"
+    r"|\b(it|its|they|them|their|he|she|him|his|her|this|these|those|above|previous|earlier|again"
+    r"|you said|your (last )?(answer|response))\b",
+    re.IGNORECASE)
+
+
+def is_standalone(query: str) -> bool:
+    """True when the question can be answered without the conversation before it"""
+    return not CONTEXT_REFERENCE.search(query)
+
+
+def context_fingerprint(doc_ids: list[str]) -> str:
+    return hashlib.sha256("\0".join(sorted(doc_ids)).encode("utf-8")).hexdigest()
+
+
+class _StoreAnswers:
+    """Answers of one knowledge base: unit query vectors as one matrix + entry dicts in the same order"""
+
+    def __init__(self):
+        self.vectors = None
+        self.entries = []
+
+    def remove(self, rows):
+        keep = np.ones(len(self.entries), dtype=bool)
+        keep[list(rows)] = False
+        self.vectors = self.vectors[keep] if keep.any() else None
+        self.entries = [entry for entry, kept in zip(self.entries, keep) if kept]
+
+
+class SemanticAnswerCache:
+    """Opt-in cache of (query, retrieved context fingerprint, answer) per vectorstore_path.
+
+    A new query hits when the cosine similarity of its embedding with a cached query is above threshold,
+    the entry is younger than ttl_seconds and its context chunks still exist in the store.
+    Each store keeps at most max_entries answers, the least recently used are evicted first.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, ttl_seconds: float = ANSWER_CACHE_TTL,
+                 max_entries: int = ANSWER_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._stores = {}   # {abs vectorstore_path: _StoreAnswers}
+        self._stats = {}    # {abs vectorstore_path: {"hits": n, "misses": n}}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(vectorstore_path: str) -> str:
+        return os.path.abspath(vectorstore_path)
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _count(self, key: str, name: str):
+        self._stats.setdefault(key, {"hits": 0, "misses": 0})[name] += 1
+        CACHE_LOOKUPS.inc(result={"hits": "hit", "misses": "miss"}[name])
+
+    def lookup(self, vectorstore_path: str, query_vector, is_valid=None):
+        """Best cached entry for this query or None. is_valid(entry) can reject entries (e.g. context chunks gone)."""
+        key = self._key(vectorstore_path)
+        unit = self._unit(query_vector)
+        now = time.time()
+        with self._lock:
+            answers = self._stores.get(key)
+            if answers is not None and answers.entries:
+                expired = [row for row, entry in enumerate(answers.entries) if now - entry["created_at"] > self.ttl_seconds]
+                if expired:
+                    answers.remove(expired)
+            if answers is None or not answers.entries:
+                self._count(key, "misses")
+                return None
+
+            similarity = answers.vectors @ unit
+            best = int(np.argmax(similarity))
+            entry = answers.entries[best]
+            if similarity[best] < self.threshold or (is_valid is not None and not is_valid(entry)):
+                self._count(key, "misses")
+                return None
+            entry["last_used"] = now
+            self._count(key, "hits")
+            return {**entry, "similarity": float(similarity[best])}
+
+    def add(self, vectorstore_path: str, query: str, query_vector, doc_ids: list[str], answer: str):
+        key = self._key(vectorstore_path)
+        now = time.time()
+        entry = {"query": query,
+                 "doc_ids": list(doc_ids),
+                 "context_fingerprint": context_fingerprint(doc_ids),
+                 "answer": answer,
+                 "created_at": now,
+                 "last_used": now}
+        unit = self._unit(query_vector)[None, :]
+        with self._lock:
+            answers = self._stores.setdefault(key, _StoreAnswers())
+            if len(answers.entries) >= self.max_entries:
+                oldest = min(range(len(answers.entries)), key=lambda row: answers.entries[row]["last_used"])
+                answers.remove([oldest])
+            answers.vectors = unit if answers.vectors is None else np.vstack([answers.vectors, unit])
+            answers.entries.append(entry)
+
+    def invalidate(self, vectorstore_path: str):
+        with self._lock:
+            self._stores.pop(self._key(vectorstore_path), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for key, counts in self._stats.items():
+                total = counts["hits"] + counts["misses"]
+                answers = self._stores.get(key)
+                result[key] = {**counts,
+                               "hit_rate": counts["hits"] / total if total else 0.0,
+                               "entries": len(answers.entries) if answers else 0}
+            return result
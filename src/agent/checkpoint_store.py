@@ -0,0 +1,208 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "./chat_hist/chat.db")
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "0"))   # > 0 -> keep only the last n checkpoints per thread
+
+# WAL: readers never wait for the writer, NORMAL sync is safe with WAL (an OS crash can lose the last commit only)
+PRAGMAS = {"journal_mode": "WAL",
+           "synchronous": "NORMAL",
+           "busy_timeout": 10_000,        # ms a writer waits for the write lock instead of failing
+           "cache_size": -64_000,         # KiB of page cache per connection
+           "temp_store": "MEMORY",
+           "mmap_size": 256 * 1024 * 1024,
+           "wal_autocheckpoint": 1000}
+
+
+class SQLiteConnectionPool:
+    """One connection per thread on the same database file, all opened with PRAGMAS"""
+
+    def __init__(self, db_path: str, pragmas: dict = PRAGMAS):
+        self.db_path = os.path.abspath(db_path)
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.open()
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """SqliteSaver on a per thread connection pool instead of one connection behind one lock.
+
+    - WAL + PRAGMAS: concurrent requests read checkpoints in parallel, writers queue on SQLite's own lock
+    - threads table (thread_id primary key, updated_at index) kept up to date on every put,
+      so listing conversations does not scan every checkpoint
+    - prune(keep_last) drops old checkpoints (and their writes) per thread, automatic with CHECKPOINT_KEEP_LAST
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool, keep_last: int = CHECKPOINT_KEEP_LAST, **kwargs):
+        self.pool = pool
+        self.keep_last = keep_last
+        self._ready = False
+        self._setup_lock = threading.RLock()
+        super().__init__(conn=pool.connection(), **kwargs)
+
+    @classmethod
+    def from_path(cls, db_path: str = CHECKPOINT_DB_PATH, **kwargs) -> "PooledSqliteSaver":
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        return cls(SQLiteConnectionPool(db_path), **kwargs)
+
+    def setup(self) -> None:
+        if self._ready:
+            return
+        with self._setup_lock:
+            if self._ready:
+                return
+            super().setup()   # checkpoints + writes tables
+            self._setup_threads_table(self.pool.connection())
+            self._ready = True
+
+    @staticmethod
+    def _setup_threads_table(conn: sqlite3.Connection):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                checkpoints INTEGER NOT NULL DEFAULT 0);
+            CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+        """)
+        # databases written before the threads table existed: fill it once from the checkpoints
+        if conn.execute("SELECT 1 FROM threads LIMIT 1").fetchone() is None:
+            now = time.time()
+            conn.execute("""INSERT OR IGNORE INTO threads (thread_id, created_at, updated_at, checkpoints)
+                            SELECT thread_id, ?, ?, COUNT(*) FROM checkpoints GROUP BY thread_id""", (now, now))
+        conn.commit()
+
+    @contextmanager
+    def cursor(self, transaction: bool = True):
+        self.setup()
+        conn = self.pool.connection()
+        cur = conn.cursor()
+        try:
+            yield cur
+            if transaction:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        now = time.time()
+        with self.cursor() as cur:
+            cur.execute("""INSERT INTO threads (thread_id, created_at, updated_at, checkpoints) VALUES (?, ?, ?, 1)
+                           ON CONFLICT(thread_id) DO UPDATE SET updated_at=excluded.updated_at,
+                                                                checkpoints=checkpoints + 1""", (thread_id, now, now))
+            count = cur.execute("SELECT checkpoints FROM threads WHERE thread_id=?", (thread_id,)).fetchone()[0]
+        # prune in batches (when twice the limit is reached), not after every super-step
+        if self.keep_last and count >= 2 * self.keep_last:
+            self.prune(thread_id, self.keep_last)
+        return next_config
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM checkpoints WHERE thread_id=?", (str(thread_id),))
+            cur.execute("DELETE FROM writes WHERE thread_id=?", (str(thread_id),))
+            cur.execute("DELETE FROM threads WHERE thread_id=?", (str(thread_id),))
+
+    def list_threads(self, limit: int = None) -> list[str]:
+        """Thread ids, most recently updated first"""
+        with self.cursor(transaction=False) as cur:
+            query = "SELECT thread_id FROM threads ORDER BY updated_at DESC"
+            rows = cur.execute(query + " LIMIT ?", (limit,)) if limit else cur.execute(query)
+            return [row[0] for row in rows.fetchall()]
+
+    def latest_checkpoint_id(self, thread_id: str, checkpoint_ns: str = ""):
+        """Id of the newest checkpoint of a thread (None if it has none), a primary key lookup, used as the thread version"""
+        with self.cursor(transaction=False) as cur:
+            row = cur.execute("SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id=? AND checkpoint_ns=?",
+                              (str(thread_id), checkpoint_ns)).fetchone()
+        return row[0] if row else None
+
+    def prune(self, thread_id: str = None, keep_last: int = None) -> int:
+        """Delete all but the keep_last newest checkpoints of a thread (every thread when None), returns rows deleted.
+        The latest state is untouched, only the history used for time travel gets shorter.
+        """
+        keep_last = keep_last or self.keep_last
+        if not keep_last:
+            return 0
+        deleted = 0
+        with self.cursor() as cur:
+            thread_ids = [thread_id] if thread_id else [row[0] for row in cur.execute("SELECT thread_id FROM threads")]
+            for thread in thread_ids:
+                for (namespace,) in cur.execute("SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id=?",
+                                                (str(thread),)).fetchall():
+                    # checkpoint ids are time ordered (uuid6), the same order SqliteSaver lists them in
+                    keep = """SELECT checkpoint_id FROM checkpoints WHERE thread_id=? AND checkpoint_ns=?
+                              ORDER BY checkpoint_id DESC LIMIT ?"""
+                    params = (str(thread), namespace, str(thread), namespace, keep_last)
+                    cur.execute(f"DELETE FROM writes WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id NOT IN ({keep})",
+                                params)
+                    cur.execute(f"DELETE FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id NOT IN ({keep})",
+                                params)
+                    deleted += cur.rowcount
+                cur.execute("""UPDATE threads SET checkpoints=(SELECT COUNT(*) FROM checkpoints WHERE thread_id=?)
+                               WHERE thread_id=?""", (str(thread), str(thread)))
+        return deleted
+
+    def compact(self):
+        """Fold the WAL into the database file and give freed pages back to the OS (run after a big prune)"""
+        conn = sqlite3.connect(self.pool.db_path)   # VACUUM needs a connection without an open transaction
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        logger.info(f"Compacted checkpoint database {self.pool.db_path}")
+
+
+def main():
+    """Offline maintenance: python -m src.agent.checkpoint_store --keep-last 20 --compact"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Prune old checkpoints per thread and compact the chat database")
+    parser.add_argument("--db", default=CHECKPOINT_DB_PATH)
+    parser.add_argument("--keep-last", type=int, required=True, help="checkpoints kept per thread")
+    parser.add_argument("--thread", help="only this thread (default every thread)")
+    parser.add_argument("--compact", action="store_true", help="VACUUM after pruning")
+    args = parser.parse_args()
+
+    saver = PooledSqliteSaver.from_path(args.db)
+    print(f"deleted {saver.prune(args.thread, args.keep_last)} checkpoints")
+    if args.compact:
+        saver.compact()
+    saver.pool.close()
+
+
+if __name__ == "__main__":
+    main()
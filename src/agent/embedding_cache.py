@@ -0,0 +1,145 @@
+import hashlib
+import inspect
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.observability.metrics import REGISTRY
+from src.observability.tracing import timed
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.db")
+
+CACHE_LOOKUPS = REGISTRY.counter("embedding_cache_lookups_total", "Embedding cache lookups per text by model, kind and result")
+
+
+class CachedEmbeddings(Embeddings):
+    """Content addressed cache in front of any langchain Embeddings model.
+
+    Vectors are stored in SQLite as float32 blobs keyed by (model, kind, sha256(text)).
+    kind is "document" or "query" because some providers (Google) embed them with a different task type.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str = None, db_path: str = DEFAULT_CACHE_PATH):
+        self.embeddings = embeddings
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS embeddings (
+                                model TEXT NOT NULL,
+                                kind TEXT NOT NULL,
+                                text_hash TEXT NOT NULL,
+                                vector BLOB NOT NULL,
+                                PRIMARY KEY (model, kind, text_hash))""")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _get_many(self, kind: str, hashes: list[str]) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # sqlite has a limit on bound variables so look up in slices
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model=? AND kind=? AND text_hash IN ({placeholders})",
+                    [self.model_name, kind, *batch]).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _put_many(self, kind: str, items: list[tuple[str, list[float]]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, kind, text_hash, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_name, kind, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                 for text_hash, vector in items])
+            self._conn.commit()
+
+    def _count(self, kind: str, hits: int = 0, misses: int = 0):
+        """hits / misses for stats() and embedding_cache_lookups_total in /metrics"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        if hits:
+            CACHE_LOOKUPS.inc(hits, model=self.model_name, kind=kind, result="hit")
+        if misses:
+            CACHE_LOOKUPS.inc(misses, model=self.model_name, kind=kind, result="miss")
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes = [self.text_hash(text) for text in texts]
+        found = self._get_many("document", hashes)
+
+        # only send texts we have never seen (deduplicated) to the API
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found:
+                missing.setdefault(text_hash, text)
+        if missing:
+            with timed(f"embed_documents:{self.model_name}", "model"):
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self._put_many("document", new_items)
+            found.update(new_items)
+
+        self._count("document", hits=len(texts) - len(missing), misses=len(missing))
+        return [found[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        text_hash = self.text_hash(text)
+        found = self._get_many("query", [text_hash])
+        if text_hash in found:
+            self._count("query", hits=1)
+            return found[text_hash]
+
+        with timed(f"embed_query:{self.model_name}", "model"):
+            vector = self.embeddings.embed_query(text)
+        self._put_many("query", [(text_hash, vector)])
+        self._count("query", misses=1)
+        return vector
+
+    def _embed_queries_uncached(self, texts: list[str]) -> list[list[float]]:
+        """Query embeddings of many texts in as few API calls as the provider allows"""
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(texts)
+        if "task_type" in inspect.signature(self.embeddings.embed_documents).parameters:
+            # Google embeds queries with their own task type, documents batching is fine with it set
+            return self.embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+        return [self.embeddings.embed_query(text) for text in texts]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """embed_query for many queries at once (batch workloads), cached like embed_query"""
+        hashes = [self.text_hash(text) for text in texts]
+        found = self._get_many("query", hashes)
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found:
+                missing.setdefault(text_hash, text)
+        if missing:
+            with timed(f"embed_queries:{self.model_name}", "model"):
+                vectors = self._embed_queries_uncached(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self._put_many("query", new_items)
+            found.update(new_items)
+
+        self._count("query", hits=len(texts) - len(missing), misses=len(missing))
+        return [found[text_hash] for text_hash in hashes]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"model": self.model_name,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
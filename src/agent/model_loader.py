@@ -1,8 +1,10 @@
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
-from langchain_cohere import CohereRerank
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from groq import Groq
+from src.agent.embedding_cache import CachedEmbeddings
+from src.rerank.rerankers import CachedReranker,load_reranker
+from src.observability.tracing import ModelMetricsCallback
 import os
 
 # setting up ENV variable
@@ -28,20 +30,31 @@ except RuntimeError:
     asyncio.set_event_loop(asyncio.new_event_loop())
 
 
-# Brain
-model = ChatGroq(model="Llama-3.3-70B-Versatile")
+# MODEL_BACKEND=fake swaps every model for the deterministic local stand-ins of src.benchmark (no API keys, no network)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "api")
 
-reranker_llm = CohereRerank(model="rerank-english-v3.0") 
+if MODEL_BACKEND == "fake":
+    from src.benchmark.fake_models import load_fake_models
+    model, reranker_llm, summary_llm, EMBEDDER = load_fake_models()
+    audio_converter_model = None
+else:
+    # Brain
+    # callbacks record latency + token usage of every call in /metrics and the request trace
+    model = ChatGroq(model="Llama-3.3-70B-Versatile",callbacks=[ModelMetricsCallback("groq:Llama-3.3-70B-Versatile")])
 
-summary_llm = ChatOpenAI(model="gpt-4.1-nano", temperature=0)
+    # RERANKER_BACKEND=cohere (default) | cross_encoder (local CPU) | fusion (no model), results cached per query + candidates
+    reranker_llm = CachedReranker(reranker=load_reranker(), top_n=3)
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    summary_llm = ChatOpenAI(model="gpt-4.1-nano", temperature=0,callbacks=[ModelMetricsCallback("openai:gpt-4.1-nano")])
+
+    # def Embedder():
+    #     return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
 
-# def Embedder():
-#     return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    # every embedding call (ingestion, query, redundancy filter) goes through the local cache first
+    EMBEDDER = CachedEmbeddings(GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+                                model_name="models/embedding-001")
 
-EMBEDDER = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    audio_converter_model = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-audio_converter_model = Groq(api_key=os.getenv("GROQ_API_KEY"))
 print("Success")
 
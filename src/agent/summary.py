@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.prompt_library.prompt import summary_prompt_template
+
+logger = logging.getLogger(__name__)
+
+# fold raw messages into the summary once this many are waiting (6 messages = 3 question/answer turns)
+SUMMARY_EVERY = int(os.getenv("SUMMARY_EVERY", "6"))
+
+
+def format_messages(messages) -> str:
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"Human: {message.content}")
+        elif isinstance(message, AIMessage):
+            lines.append(f"AI: {message.content}")
+    return "\n".join(lines)
+
+
+def build_history(state) -> str:
+    """Conversation history for the prompt = running summary + messages not folded into it yet"""
+    messages = state.get("messages", [])
+    recent = messages[state.get("summary_watermark", 0):]
+    parts = []
+    if state.get("summary"):
+        parts.append(f"Summary of earlier conversation:\n{state['summary']}")
+    if recent:
+        parts.append(format_messages(recent))
+    return "\n\n".join(parts)
+
+
+class ThreadSummarizer:
+    """Keeps an incremental conversation summary per thread_id inside the checkpointed graph state.
+
+    Runs in the background after the answer was returned, only messages after summary_watermark are sent
+    to the summary LLM, then summary + summary_watermark are written back with update_state.
+    Updates are serialized per thread (one running, at most one queued) and a result is dropped when the thread
+    changed under it (watermark moved or messages deleted), the next schedule starts from the fresh state.
+    """
+
+    def __init__(self, app, summary_llm, max_workers: int = 2):
+        self.app = app   # compiled graph
+        self.summary_llm = summary_llm
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._pending = set()   # threads with an update queued but not started
+
+    def _thread_lock(self, thread_id: str):
+        with self._locks_guard:
+            return self._locks.setdefault(thread_id, threading.Lock())
+
+    def schedule(self, thread_id: str):
+        """Update the summary of thread_id in the background (no-op if not enough new messages)"""
+        with self._locks_guard:
+            if thread_id in self._pending:
+                return None   # the queued update will read the newest messages anyway
+            self._pending.add(thread_id)
+        return self.executor.submit(self._run_pending, thread_id)
+
+    def _run_pending(self, thread_id: str):
+        with self._locks_guard:
+            self._pending.discard(thread_id)
+        self.update_summary(thread_id)
+
+    def update_summary(self, thread_id: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        # one summary at a time per thread, different threads run in parallel
+        with self._thread_lock(thread_id):
+            try:
+                values = self.app.get_state(config).values
+                messages = values.get("messages", [])
+                watermark = values.get("summary_watermark", 0)
+                new_messages = messages[watermark:]
+                if len(new_messages) < SUMMARY_EVERY:
+                    return
+
+                prompt = summary_prompt_template.format(summary=values.get("summary", ""),
+                                                        new_lines=format_messages(new_messages))
+                summary = self.summary_llm.invoke(prompt).content
+
+                # a turn or a delete may have landed while the LLM was running, never write over a newer state
+                current = self.app.get_state(config).values
+                if current.get("summary_watermark", 0) != watermark or len(current.get("messages", [])) < len(messages):
+                    logger.info(f"Thread {thread_id} changed during summarization, summary not written")
+                    return
+                self.app.update_state(config,
+                                      {"summary": summary, "summary_watermark": len(messages)},
+                                      as_node="Agent")
+            except Exception as e:
+                logger.error(f"Summary update failed for thread {thread_id}: {e}")
@@ -1,47 +1,64 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader,PyPDFLoader
 from langchain_community.vectorstores import FAISS
 
 import os
+import uuid
+import hashlib
+from dataclasses import replace
 from src.agent.model_loader import model
-from src.prompt_library.prompt import prompt_template
+from src.prompt_library.prompt import prompt_template,chat_prompt_template
 
 from typing import TypedDict,Annotated
 from langchain_core.documents import Document
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph.message import add_messages
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers import EnsembleRetriever,ContextualCompressionRetriever
-from langchain_community.document_transformers import LongContextReorder,EmbeddingsRedundantFilter
+from langgraph.channels.untracked_value import UntrackedValue
+from langchain.retrievers import ContextualCompressionRetriever
+from langchain_community.document_transformers import LongContextReorder
 from langchain.retrievers.document_compressors import DocumentCompressorPipeline
 
-
-from langchain_core.chat_history import InMemoryChatMessageHistory
-from langchain.memory import ConversationSummaryMemory
-from src.agent.model_loader import summary_llm
+from src.agent.summary import build_history
+from src.agent.answer_cache import SemanticAnswerCache,ANSWER_CACHE_ENABLED,is_standalone
+from src.ingestion.jobs import IngestionManager,IngestionCancelled,CANCELLED
+from src.ingestion.pdf_loader import ParallelPDFLoader,list_pdfs
+from src.ingestion.embedding_stage import EmbeddingStage
+from src.vectorstore.store_cache import VectorStoreCache
+from src.vectorstore.chunk_store import save_store,load_store
+from src.vectorstore.bm25_index import BM25Index
+from src.vectorstore.redundancy import FaissRedundantFilter
+from src.retrieval.hybrid import HybridRetriever
+from src.retrieval.staged import StagedRetriever,RETRIEVAL_BUDGET_MS
+from src.retrieval.federated import FederatedRetriever,load_stores
+from src.retrieval.router import QueryRouter,ROUTER_ENABLED,SKIP
+from src.vectorstore.manifest import StoreManifest
+from src.vectorstore.index_spec import IndexSpec
+from src.vectorstore.centroids import StoreCentroids
+from langchain_community.docstore.in_memory import InMemoryDocstore
 
 
 
 class AgenticRAG(TypedDict):
     query:str
     documents_path:str
-    documents:list[Document]
-    chunks:list[Document]
-    vectorstore:object
-    retrieved_docs:list[Document]
+    # large intermediates live in untracked channels: passed between nodes of one run, never written to the checkpoint
+    documents: Annotated[list[Document], UntrackedValue]
+    chunks: Annotated[list[Document], UntrackedValue]
+    retrieved_docs: Annotated[list[Document], UntrackedValue]
+    retrieved_refs:list[dict]  # what is persisted of the context: [{"id", "sha256", "source", "page", "store"}]
     answer:str
     vectorstore_path:str
+    vectorstore_paths:list    # > 1 store -> federated retrieval over all of them (vectorstore_path is the first)
+    index_spec:dict           # optional IndexSpec (flat / ivf_flat / ivf_pq / hnsw) used when the store is built
     messages: Annotated[list[BaseMessage], add_messages]
-
-
-# Create conversation summary memory
-chat_history = InMemoryChatMessageHistory()
-
-memory = ConversationSummaryMemory(
-    memory_key="chat_history",
-    chat_memory=chat_history,
-    llm=summary_llm,
-    return_messages=True)
+    summary:str               # running conversation summary of this thread
+    summary_watermark:int     # number of messages already folded into summary
+    use_answer_cache:bool     # opt-in semantic answer cache for self-contained questions
+    cache_hit:bool
+    latency_budget_ms:float   # > 0 -> staged retrieval under this budget (RETRIEVAL_BUDGET_MS env default)
+    retrieval_stages:list     # stages the staged retriever took: [{"stage","status","ms"}]
+    auto_route:bool           # let Query_Router pick stores / depth / skip retrieval (ROUTER_ENABLED env default)
+    route_candidates:list     # stores the router may pick from ([] -> only the thread's store)
+    route:dict                # RouteDecision of this turn: {"action","reason","stores","k","rerank","scores"}
 
 
 class GraphNodes:
@@ -49,137 +66,329 @@ class GraphNodes:
         self.embedding_model= embedding_model 
         self.reranker_model = reranker_model
         self.summary_llm = summary_llm
+        # loaded FAISS stores shared by every request in this process
+        self.store_cache = VectorStoreCache(embedding_model=embedding_model)
+        # background PDF ingestion started at upload time
+        self.ingestion = IngestionManager(pipeline=self)
+        # answers of earlier first turn queries per knowledge base
+        self.answer_cache = SemanticAnswerCache()
+        # picks stores + retrieval depth per query, or skips retrieval
+        self.router = QueryRouter(embeddings=embedding_model,store_cache=self.store_cache)
+
+    def load_documents(self,documents_path:str):
+        """Yield the pages of a PDF (or of every PDF in a directory) one Document at a time, in order.
+        Parsing is CPU bound so files / page ranges are parsed in parallel processes (PDF_PARSE_WORKERS).
+        """
+        yield from ParallelPDFLoader(documents_path).lazy_load()  # documents_path can also be a list of PDF files
 
-    def Document_Loader(self,state: AgenticRAG):
-        path = os.path.abspath(state["documents_path"])  # ensure absolute
-        if os.path.isfile(path):  # single PDF case
-            loader = PyPDFLoader(path)
-            loaded_pdf = loader.load()
-        elif os.path.isdir(path):  # directory case
-            loader = DirectoryLoader(
-                path=path,
-                glob="*.pdf",
-                loader_cls=PyPDFLoader)
-            loaded_pdf = loader.load()
+
+    def split_documents(self,documents:list[Document]):
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=199)
+        return splitter.split_documents(documents)
+
+
+    def store_diff(self,documents_path:str,vectorstore_path:str,index_spec:IndexSpec=None):
+        """Compare the source PDFs with the manifest of the store (added / changed / removed / unchanged files)
+        index_spec: requested index type, a store saved with a different one is rebuilt
+        """
+        source_files = list_pdfs(documents_path)
+        rebuild = not os.path.exists(os.path.join(vectorstore_path,"index.faiss")) or not StoreManifest.exists(vectorstore_path)
+        if not rebuild:
+            diff = StoreManifest.load(vectorstore_path).diff(source_files)
+            saved_spec = IndexSpec.load(vectorstore_path)
+            spec_changed = index_spec is not None and index_spec.to_dict() != saved_spec.to_dict()
+            # only flat indexes delete in place (HNSW can not, IVF ids would collide), edits to other stores mean a rebuild
+            cannot_delete = not saved_spec.supports_remove and (diff.changed or diff.removed)
+            rebuild = spec_changed or cannot_delete
+        if rebuild:
+            # nothing usable on disk (or a store from before manifests existed), build from scratch
+            diff = StoreManifest().diff(source_files)
+            diff.rebuild = True
+        return diff
+
+
+    def embed_chunks(self,chunks:list[Document],ids:list[str],vector_store=None,on_progress=None,index_spec:IndexSpec=None):
+        """Embed chunks and add them to vector_store (a new FAISS store with an index_spec index is made if None).
+        EmbeddingStage batches by token budget, runs a few requests at a time with backoff on quota errors
+        (finished batches land in the embedding cache). on_progress(chunks_embedded=n) is called as batches finish.
+        """
+        if not chunks:
+            return vector_store
+        embedder = self.embedding_model
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = EmbeddingStage(embedder).embed(texts,on_progress=on_progress)
+        text_embeddings = list(zip(texts,vectors.tolist()))
+        metadatas = [chunk.metadata for chunk in chunks]
+        if vector_store is None:
+            # IVF / PQ indexes are trained on the vectors before they are added
+            index = (index_spec or IndexSpec()).build_index(vectors)
+            vector_store = FAISS(embedding_function=embedder,index=index,docstore=InMemoryDocstore(),index_to_docstore_id={})
+        vector_store.add_embeddings(text_embeddings=text_embeddings,metadatas=metadatas,ids=ids)
+        return vector_store
+
+
+    def save_vector_store(self,vector_store,vectorstore_path:str,index_spec:IndexSpec):
+        """Save FAISS index + chunks.sqlite + BM25 index + centroids + index spec to vectorstore_path, then warm the cache"""
+        save_store(vectorstore_path,vector_store)
+        # sparse index is built here (ingest time) and saved beside the FAISS files
+        sparse_index = BM25Index.from_vector_store(vector_store)
+        sparse_index.save(vectorstore_path)
+        # topic centroids the query router compares queries with
+        StoreCentroids.from_index(vector_store.index).save(vectorstore_path)
+        index_spec.save(vectorstore_path)
+        # files changed on disk so the cache reloads the memory mapped version
+        self.store_cache.get(vectorstore_path)
+
+
+    def update_vector_store(self,chunks:list[Document],diff,vectorstore_path:str,on_progress=None,index_spec:IndexSpec=None):
+        """Apply a ManifestDiff: drop chunks of changed/removed files, embed chunks of new/changed files, keep the rest.
+        chunks must come from diff.files_to_parse. Nothing is written to disk until every chunk is embedded,
+        so a failed/cancelled update leaves the old store untouched.
+        index_spec is only used for a rebuild, an update keeps the index type the store was saved with.
+        """
+        if diff.rebuild:
+            manifest,vector_store = StoreManifest(),None
+            index_spec = index_spec or IndexSpec()
         else:
-            raise ValueError(f"Invalid documents_path: {path}")
+            manifest = StoreManifest.load(vectorstore_path)
+            index_spec = IndexSpec.load(vectorstore_path)
+            # private in memory copy that can be edited, the cached (memory mapped) one keeps serving queries until the new one is saved
+            vector_store = load_store(vectorstore_path,self.embedding_model,mmap=False)
+            stale_ids = manifest.chunk_ids(diff.changed+diff.removed)
+            if stale_ids:
+                vector_store.delete(stale_ids)
+
+        ids = [uuid.uuid4().hex for _ in chunks]
+        # finished embedding batches survive a crash here (CachedEmbeddings), the next run only embeds the rest
+        vector_store = self.embed_chunks(chunks,ids,vector_store=vector_store,on_progress=on_progress,
+                                         index_spec=index_spec)
+        if vector_store is None:
+            raise ValueError(f"No text could be extracted to build {vectorstore_path}")
+
+        for path in diff.removed:
+            manifest.files.pop(path,None)
+        for path in diff.unchanged:
+            manifest.files[path].update(diff.entries[path])
+        for path in diff.files_to_parse:
+            manifest.files[path] = {**diff.entries[path],"chunk_ids":[]}
+        for chunk,chunk_id in zip(chunks,ids):
+            manifest.files[chunk.metadata["source"]]["chunk_ids"].append(chunk_id)
+
+        os.makedirs(vectorstore_path,exist_ok=True)
+        self.save_vector_store(vector_store,vectorstore_path,index_spec)
+        manifest.save(vectorstore_path)
+        return vector_store
+
+
+    @staticmethod
+    def index_spec(state:AgenticRAG):
+        """IndexSpec requested in the state, None means keep whatever the store was saved with (flat for new stores)"""
+        return IndexSpec.from_dict(state["index_spec"]) if state.get("index_spec") else None
+
+
+    def Document_Loader(self,state: AgenticRAG):
+        # only new or changed files are parsed, unchanged ones are already in the store
+        diff = self.store_diff(state["documents_path"],state["vectorstore_path"],self.index_spec(state))
+        loaded_pdf = list(self.load_documents(diff.files_to_parse))
         return {"documents": loaded_pdf}
 
 
     def Text_Splitter(self,state:AgenticRAG):
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=199)
-        chunks = splitter.split_documents(state["documents"])
-        return {"chunks":chunks}
+        chunks = self.split_documents(state["documents"])
+        return {"chunks":chunks,"documents":[]}   # pages are not needed anymore, free them for the rest of the run
 
 
     def Create_Vector_Store(self,state:AgenticRAG):
-        embedder = self.embedding_model
-        vector_store = FAISS.from_documents(documents=state["chunks"],embedding=embedder)
-        vector_store.save_local(state["vectorstore_path"])
-        return {"vectorstore_path":state["vectorstore_path"]}
+        # diff is cheap the second time (file hashes are cached by size + mtime)
+        index_spec = self.index_spec(state)
+        diff = self.store_diff(state["documents_path"],state["vectorstore_path"],index_spec)
+        self.update_vector_store(state["chunks"],diff,state["vectorstore_path"],index_spec=index_spec)
+        return {"vectorstore_path":state["vectorstore_path"],"chunks":[]}
 
 
 
     def Load_Vector_Store(self,state:AgenticRAG):
-        embedder = self.embedding_model
-        vector_store = FAISS.load_local(folder_path=state["vectorstore_path"],
-                                        embeddings=embedder,
-                                        allow_dangerous_deserialization=True)
+        # warm the cache, Retriever reuses the same loaded object
+        self.store_cache.get(state["vectorstore_path"])
         return {"vectorstore_path":state["vectorstore_path"]}
 
 
-    def Retriever(self,state: AgenticRAG):
-        vector_store = FAISS.load_local(
-            folder_path=state["vectorstore_path"],
-            embeddings=self.embedding_model,
-            allow_dangerous_deserialization=True)
-        
-        # Dense retriever
-        retriever = vector_store.as_retriever(search_type="similarity",search_kwargs={"k":5})
+    @staticmethod
+    def use_answer_cache(state:AgenticRAG):
+        """Self-contained questions use the answer cache on any turn (threads map to stores, so a store has one thread),
+        questions that refer back to the conversation ("what about its side effects?") never do
+        """
+        # federated answers depend on every store queried, the cache is keyed by one store
+        if len(state.get("vectorstore_paths") or [])>1:
+            return False
+        return bool(state.get("use_answer_cache",ANSWER_CACHE_ENABLED)) and is_standalone(state["query"])
+
+
+    def cache_answer(self,state:AgenticRAG):
+        """Whether this turn's answer may be stored: retrieved from the thread's own store, not a routed chat reply"""
+        route = state.get("route") or {}
+        if route.get("action")==SKIP or route.get("stores") not in (None,[],[state["vectorstore_path"]]):
+            return False
+        return self.use_answer_cache(state)
+
+
+    def Answer_Cache_Lookup(self,state:AgenticRAG):
+        if not self.use_answer_cache(state):
+            return {"cache_hit":False}
+        loaded = self.store_cache.get(state["vectorstore_path"])
+        query_vector = self.embedding_model.embed_query(state["query"])
+        # an answer is only reused while every chunk it was built from is still in the store
+        entry = self.answer_cache.lookup(state["vectorstore_path"],query_vector,
+                                         is_valid=lambda entry: all(doc_id in loaded.positions for doc_id in entry["doc_ids"]))
+        if entry is None:
+            return {"cache_hit":False}
+        return {
+            "cache_hit":True,
+            "answer":entry["answer"],
+            "retrieved_docs":[],
+            "retrieved_refs":[],
+            "retrieval_stages":[],
+            "route":{},
+            "messages":[HumanMessage(content=state["query"]),AIMessage(content=entry["answer"])]}
 
-        query = state["query"]
 
-        if "chunks" in state:
-            ## Sparse retriever
-            bm25_retriever = BM25Retriever.from_documents(state["chunks"])
-            #if query is short like medical term we take bigger weight of bm25 retriever and if query is long like natual language then we reduce weightage of bm25 retriever
-            len_query = len(query.split())
-            if len_query<6:
-                weights = [0.6,0.4]
-            else:
-                weights = [0.85, 0.15]  # rely on FAISS more
-            
-            ensemble_retriever  = EnsembleRetriever(
-                retrievers=[retriever,bm25_retriever],
-                weights=weights)
+    def check_answer_cache(self,state:AgenticRAG):
+        return "hit" if state.get("cache_hit") else "miss"
+
+
+    def federated_retriever(self,paths:list[str],k:int=None):
+        """FederatedRetriever over every store in paths (+ the stores, for the redundancy filter)"""
+        for path in paths:
+            job = self.ingestion.find(path)
+            if job is not None:
+                job.wait()
+        stores = load_stores(self.store_cache,paths)
+        return FederatedRetriever(stores=stores,embeddings=self.embedding_model,k=k),stores
+
+
+    def Query_Router(self,state:AgenticRAG):
+        if not state.get("auto_route",ROUTER_ENABLED):
+            return {"route":{}}
+        # stores asked for explicitly (federated query) are all searched, the router only picks depth / skip
+        decision = self.router.route(state["query"],state["vectorstore_path"],
+                                     candidates=state.get("route_candidates") or [state["vectorstore_path"]],
+                                     fixed_stores=state.get("vectorstore_paths"),
+                                     has_history=bool(state.get("messages") or state.get("summary")))
+        if decision.action==SKIP:
+            return {"route":decision.to_dict(),"retrieved_docs":[],"retrieval_stages":[]}
+        return {"route":decision.to_dict()}
+
+
+    @staticmethod
+    def check_route(state:AgenticRAG):
+        return "skip" if (state.get("route") or {}).get("action")==SKIP else "retrieve"
+
+
+    def Retriever(self,state: AgenticRAG):
+        query = state["query"]
+        route = state.get("route") or {}
+        paths = route.get("stores") or state.get("vectorstore_paths") or [state["vectorstore_path"]]
+        k = route.get("k")
+
+        if len(paths)>1:
+            # several knowledge bases: searched in parallel, scores normalised and merged, then the usual rerank pipeline
+            base_retriever,stores = self.federated_retriever(paths,k=k)
+            loaded = stores[paths[0]]
         else:
-            ensemble_retriever = retriever
-        
+            loaded,stores = self.store_cache.get(paths[0]),None
+            budget_ms = state.get("latency_budget_ms") or RETRIEVAL_BUDGET_MS
+            if budget_ms>0:
+                # staged mode: skip rerank when dense is confident, cut stages that overrun the budget
+                staged = StagedRetriever(loaded_store=loaded,reranker=self.reranker_model,embeddings=self.embedding_model,
+                                         budget_ms=budget_ms)
+                result = staged.retrieve(query,k=k,rerank=route.get("rerank",True))
+                return {"retrieved_docs": result.documents,"retrieval_stages": result.stages}
+            # Dense (FAISS) + sparse (persisted BM25) searched in parallel, fused with the store's RRF weights
+            # (short queries like medical terms lean on BM25, natural language questions on FAISS)
+            params = replace(loaded.fusion,dense_k=k,sparse_k=k) if k else None   # depth picked by the router
+            base_retriever = HybridRetriever(loaded_store=loaded,params=params)
+
         # Compression pipeline (rerank + deduplicate + reorder)
         reranker = self.reranker_model # anks documents by how well they answer the user's question.
-        filter = EmbeddingsRedundantFilter(embeddings=self.embedding_model) # Removes duplicate or highly similar chunks.
+        filter = FaissRedundantFilter(loaded_store=loaded,embeddings=self.embedding_model,stores=stores) # Removes duplicate or highly similar chunks (vectors come from the FAISS index, no embedding calls)
         reordering = LongContextReorder()  # Reorders documents to maximize coherence in long context windows
-        pipeline = DocumentCompressorPipeline(transformers=[reranker,filter,reordering])
 
+        if not route.get("rerank",True):
+            # shallow lookup: the fused order is good enough, no rerank call
+            docs = base_retriever.invoke(query)[:reranker.top_n]
+            docs = reordering.transform_documents(filter.transform_documents(docs))
+            return {"retrieved_docs": list(docs),"retrieval_stages": []}
+
+        pipeline = DocumentCompressorPipeline(transformers=[reranker,filter,reordering])
         compression_retriever = ContextualCompressionRetriever(
             base_compressor= pipeline,
-            base_retriever=ensemble_retriever)
+            base_retriever=base_retriever)
     
         docs = compression_retriever.invoke(query)
-        return {"retrieved_docs": docs}
+        return {"retrieved_docs": docs,"retrieval_stages": []}
 
     
-    def rebuild_memory_from_state(self,state):
-        """This Methood Rebuilds ConversationSummaryMemory by replaying saved Human/AI messages from persisted state, making the memory continuous across restarts.
-        Run this before Agent function
-        AFTER SERVER IS RESTART EMORY WILL STILL BE THIER
-        """
-        memory.chat_memory.clear()  # clear any old messages
-        for msg in state.get("messages", []):
-            if isinstance(msg, HumanMessage):
-                memory.chat_memory.add_user_message(msg.content)
-            elif isinstance(msg, AIMessage):
-                memory.chat_memory.add_ai_message(msg.content)
-
+    @staticmethod
+    def document_refs(docs:list[Document]):
+        """Docstore id + content hash of each document, enough to find it again in the store (and notice it changed)"""
+        return [{"id": doc.id or doc.metadata.get("docstore_id"),
+                 "sha256": hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest(),
+                 "source": doc.metadata.get("source"),
+                 "page": doc.metadata.get("page"),
+                 "store": doc.metadata.get("source_store")} for doc in docs]
+
+
+    @staticmethod
+    def format_prompt(query:str,docs:list[Document],history:str=""):
+        # context = "\n\n".join([doc.page_content for doc in docs])
+        context = "\n\n".join([f"Source: {doc.metadata.get('filename', '')}, Page: {doc.metadata.get('page', '')}\n{doc.page_content}"
+        for doc in docs])
+        return prompt_template.format(
+            history=history,
+            context=context,
+            question=query)
 
 
     def Agent(self,state: AgenticRAG):
-        # 🔑 Always rebuild memory from state before use
-        self.rebuild_memory_from_state(state)
-        
         docs = state["retrieved_docs"]
-        # context = "\n\n".join([doc.page_content for doc in docs])
-        context = "\n\n".join([f"Source: {doc.metadata.get('filename', '')}, Page: {doc.metadata.get('page', '')}\n{doc.page_content}"
-        for doc in docs])
 
-        # Load summarized history
-        past_dialogue = memory.load_memory_variables({})["chat_history"]
+        # summary of this thread + the messages not summarized yet (summary is updated in background by ThreadSummarizer)
+        past_dialogue = build_history(state)
 
         # Format prompt
-        formated_prompt = prompt_template.format(
-            history=past_dialogue,
-            context=context,
-            question=state["query"])
+        if self.check_route(state)=="skip":
+            # router skipped retrieval (chit-chat / follow-up), answer from the conversation alone
+            formated_prompt = chat_prompt_template.format(history=past_dialogue,question=state["query"])
+        else:
+            formated_prompt = self.format_prompt(state["query"],docs,history=past_dialogue)
 
-        response = model.invoke(formated_prompt)
+        # stream_tokens marks this call so /query/stream forwards its tokens
+        response = model.invoke(formated_prompt,config={"metadata":{"stream_tokens":True}})
 
-        # Update summary memory properly
-        memory.save_context(
-            {"input": state["query"]}, 
-            {"output": response.content})
+        if self.cache_answer(state):
+            self.answer_cache.add(state["vectorstore_path"],
+                                  query=state["query"],
+                                  query_vector=self.embedding_model.embed_query(state["query"]),  # embedding cache hit
+                                  doc_ids=[doc.id or doc.metadata.get("docstore_id") for doc in docs],
+                                  answer=response.content)
 
-        # Save to state instead of external memory
-        state.setdefault("messages", [])
-        state["messages"].append(HumanMessage(content=state["query"]))
-        state["messages"].append(AIMessage(content=response.content))
-        
+        # only this turn, add_messages appends it to the thread (returning the whole list rewrote it every turn)
         return {
             "answer": response.content,
-            "messages": state["messages"]}
+            "retrieved_refs": self.document_refs(docs),
+            "messages": [HumanMessage(content=state["query"]),AIMessage(content=response.content)]}
 
 
     def check_pdf_or_not(self,state: AgenticRAG):
-        if state.get("documents_path") and not os.path.exists(state["vectorstore_path"]):
+        # if this PDF is still being ingested in background, wait for it and reuse the finished index
+        job = self.ingestion.find(state["vectorstore_path"])
+        if job is not None:
+            job.wait()
+            if job.status==CANCELLED:
+                # the user stopped this build, do not quietly redo it inline, they have to upload again
+                raise IngestionCancelled(job.job_id)
+        # rebuild only what changed since the store was last built (new / edited / deleted PDFs)
+        if state.get("documents_path") and not self.store_diff(state["documents_path"],state["vectorstore_path"],self.index_spec(state)).is_empty:
             return "create"
         else:
             return "load"
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""Synthetic PDF corpora for the offline benchmark.
+
+Pages are made of pseudo words from a fixed vocabulary, every file leans on its own topic words so
+dense and BM25 retrieval have something to find. Same seed -> byte identical PDFs.
+"""
+import os
+
+import numpy as np
+
+# (files, pages per file)
+CORPUS_SIZES = {"small": (2, 10), "medium": (8, 25), "large": (20, 50)}
+
+LINES_PER_PAGE = 50
+WORDS_PER_LINE = 12
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "der", "mal", "pen", "qua", "ros", "tel", "zin", "bra"]
+
+
+def vocabulary(size: int = 3000, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES, size=rng.integers(2, 5))))
+    return sorted(words)
+
+
+def _pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: list[list[str]]):
+    """Minimal text only PDF (Helvetica, one content stream per page) that pypdf can extract text from"""
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               2: f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(pages)} >>".encode(),
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    for page_id, lines in zip(page_ids, pages):
+        content = "\n".join(["BT", "/F1 9 Tf", "14 TL", "40 760 Td"]
+                            + [f"({_pdf_text(line)}) Tj T*" for line in lines] + ["ET"]).encode("latin-1")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>").encode()
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+    xref_offset = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for number in range(1, size):
+        out += b"%010d 00000 n \n" % offsets[number]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_offset)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_corpus(folder: str, files: int, pages_per_file: int, seed: int = 0) -> list[str]:
+    """Write files synthetic PDFs into folder (skipped when they already exist), returns their paths"""
+    os.makedirs(folder, exist_ok=True)
+    words = vocabulary(seed=seed)
+    paths = []
+    for file_number in range(files):
+        path = os.path.join(folder, f"doc_{file_number:03d}.pdf")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        rng = np.random.default_rng([seed, file_number])   # per file, so a file does not depend on the ones before it
+        topic = rng.choice(words, size=40, replace=False)
+        pages = []
+        for _ in range(pages_per_file):
+            # a third of the words come from the file topic
+            lines = [" ".join(rng.choice(topic) if rng.random() < 0.33 else rng.choice(words)
+                              for _ in range(WORDS_PER_LINE)) for _ in range(LINES_PER_PAGE)]
+            pages.append(lines)
+        write_pdf(path, pages)
+    return paths
+
+
+def make_queries(count: int, seed: int = 1) -> list[str]:
+    """Questions built from vocabulary words, short (BM25 leaning) and long ones mixed"""
+    words = vocabulary()
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in range(count):
+        terms = " ".join(rng.choice(words, size=2 if i % 3 == 0 else 6))
+        queries.append(terms if i % 3 == 0 else f"What do the documents say about {terms}?")
+    return queries
@@ -0,0 +1,127 @@
+"""Deterministic local stand-ins for every external model, with controllable latency.
+
+    ChatGroq / ChatOpenAI            -> CannedChatModel (canned answer, token streaming, usage metadata)
+    GoogleGenerativeAIEmbeddings     -> HashEmbeddings (feature hashing, similar texts get similar vectors)
+    CohereRerank                     -> SleepyFusionReranker (ScoreFusionReranker + latency)
+
+Selected with MODEL_BACKEND=fake (see src/agent/model_loader.py), latencies with the FAKE_*_MS env variables.
+"""
+import hashlib
+import os
+import re
+import time
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.rerank.rerankers import ScoreFusionReranker
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))        # time to first token
+FAKE_TOKEN_LATENCY_MS = float(os.getenv("FAKE_TOKEN_LATENCY_MS", "5"))      # per streamed token
+FAKE_EMBED_LATENCY_MS = float(os.getenv("FAKE_EMBED_LATENCY_MS", "40"))     # per embedding API call (batch)
+FAKE_RERANK_LATENCY_MS = float(os.getenv("FAKE_RERANK_LATENCY_MS", "150"))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _sleep_ms(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+class HashEmbeddings(Embeddings):
+    """Bag of hashed tokens projected to dim, L2 normalised. Same text -> same vector on every run and machine."""
+
+    def __init__(self, dim: int = 768, latency_ms: float = FAKE_EMBED_LATENCY_MS):
+        self.dim = dim
+        self.latency_ms = latency_ms
+
+    def _vector(self, text: str) -> list[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        _sleep_ms(self.latency_ms)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        _sleep_ms(self.latency_ms)
+        return self._vector(text)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        _sleep_ms(self.latency_ms)   # one batched call
+        return [self._vector(text) for text in texts]
+
+
+class CannedChatModel(BaseChatModel):
+    """Answers every prompt with the same template, token usage counted as whitespace words"""
+
+    answer: str = "Based on the provided context, the documents describe {topic}. This is a canned benchmark answer."
+    latency_ms: float = FAKE_LLM_LATENCY_MS
+    token_latency_ms: float = FAKE_TOKEN_LATENCY_MS
+
+    @property
+    def _llm_type(self) -> str:
+        return "canned-chat"
+
+    def _answer(self, messages: list[BaseMessage]) -> tuple[str, dict]:
+        prompt = " ".join(str(message.content) for message in messages)
+        words = TOKEN_PATTERN.findall(prompt)
+        text = self.answer.format(topic=" ".join(words[-3:]) or "nothing")
+        usage = {"input_tokens": len(prompt.split()), "output_tokens": len(text.split())}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return text, usage
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text, usage = self._answer(messages)
+        _sleep_ms(self.latency_ms + self.token_latency_ms * usage["output_tokens"])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _stream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text, usage = self._answer(messages)
+        _sleep_ms(self.latency_ms)
+        tokens = text.split(" ")
+        for i, token in enumerate(tokens):
+            _sleep_ms(self.token_latency_ms)
+            content = token if i == 0 else " " + token
+            last = i == len(tokens) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=content, usage_metadata=usage if last else None))
+            if run_manager:
+                run_manager.on_llm_new_token(content, chunk=chunk)
+            yield chunk
+
+
+class SleepyFusionReranker(ScoreFusionReranker):
+    """Model free ranking plus the latency of a rerank API call"""
+
+    latency_ms: float = FAKE_RERANK_LATENCY_MS
+
+    def rerank(self, query, documents):
+        _sleep_ms(self.latency_ms)
+        return super().rerank(query, documents)
+
+
+def load_fake_models():
+    """(answer LLM, reranker, summary LLM, embedder) wired like the real ones in model_loader"""
+    from src.agent.embedding_cache import CachedEmbeddings
+    from src.observability.tracing import ModelMetricsCallback
+    from src.rerank.rerankers import CachedReranker
+
+    model = CannedChatModel(callbacks=[ModelMetricsCallback("fake:answer")])
+    reranker = CachedReranker(reranker=SleepyFusionReranker(top_n=3), top_n=3)
+    summary_llm = CannedChatModel(answer="Summary of the conversation so far: {topic}.",
+                                  callbacks=[ModelMetricsCallback("fake:summary")])
+    embedder = CachedEmbeddings(HashEmbeddings(), model_name="fake-hash-768")
+    return model, reranker, summary_llm, embedder
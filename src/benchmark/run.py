@@ -0,0 +1,201 @@
+"""Offline end-to-end benchmark: ingestion, the compiled graph and the FastAPI app on fake models.
+
+No API keys or network: MODEL_BACKEND=fake (src/benchmark/fake_models.py), synthetic PDFs (src/benchmark/corpus.py).
+Everything is written under --workdir (a temp folder by default), the repo folders are not touched.
+
+Usage:
+    python -m src.benchmark.run
+    python -m src.benchmark.run --sizes small medium large --targets graph api --concurrency 1 8 32 --requests 200
+    FAKE_LLM_LATENCY_MS=800 FAKE_RERANK_LATENCY_MS=400 python -m src.benchmark.run --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.benchmark.corpus import CORPUS_SIZES, make_corpus, make_queries
+from src.ingestion.jobs import DONE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process + its finished children (PDF parse workers), Linux reports KB"""
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (self_kb + children_kb) / 1024
+
+
+def latency_row(target: str, size: str, concurrency: int, latencies: list, errors: int, seconds: float) -> dict:
+    """latencies of the successful requests only, errors = failed requests (same accounting for every target)"""
+    successes = len(latencies)
+    latencies = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {"target": target, "size": size, "concurrency": concurrency,
+            "requests": successes + errors, "errors": errors,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "req_per_s": successes / seconds if seconds else 0.0}
+
+
+def bench_ingestion(nodes, size: str, workdir: str) -> tuple[str, dict]:
+    files, pages = CORPUS_SIZES[size]
+    corpus = os.path.join(workdir, "corpora", size)
+    make_corpus(corpus, files, pages)
+    store = os.path.join(workdir, "vectorstores", size)
+    start = time.perf_counter()
+    job = nodes.ingestion.submit(documents_path=corpus, vectorstore_path=store)
+    job.wait()
+    seconds = time.perf_counter() - start
+    if job.status != DONE:
+        raise RuntimeError(f"Ingestion of the {size} corpus failed: {job.to_dict()}")
+    return store, {"size": size, "files": files, "pages": job.pages_parsed, "chunks": job.chunks_made,
+                   "seconds": seconds, "chunks_per_s": job.chunks_made / seconds if seconds else 0.0}
+
+
+def bench_graph(app, store: str, size: str, queries: list[str], concurrency: int) -> dict:
+    """Run the compiled graph directly, one thread per concurrent request, a new conversation per request"""
+    def one(i):
+        config = {"configurable": {"thread_id": f"bench-graph-{size}-{concurrency}-{i}"}}
+        start = time.perf_counter()
+        app.invoke({"query": queries[i], "vectorstore_path": store, "use_answer_cache": False,
+                    "latency_budget_ms": 0}, config=config)
+        return time.perf_counter() - start
+
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(one, i) for i in range(len(queries))]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"graph request failed: {e}", file=sys.stderr)
+    return latency_row("graph", size, concurrency, latencies, errors, time.perf_counter() - start)
+
+
+async def _bench_api(api, store: str, size: str, queries: list[str], concurrency: int) -> dict:
+    import httpx
+
+    # the app picks the store from the thread id, one predefined "store" entry per request keeps conversations apart
+    thread_ids = []
+    for i in range(len(queries)):
+        thread_id = f"bench-api-{size}-{concurrency}-{i}"
+        api.VECTORSTORE_PATHS[thread_id] = store
+        thread_ids.append(thread_id)
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(client, query, thread_id):
+        nonlocal errors
+        async with slots:
+            start = time.perf_counter()
+            response = await client.post("/query", json={"query": query, "thread_id": thread_id,
+                                                         "use_answer_cache": False})
+            if response.status_code != 200:
+                errors += 1
+                print(f"api request failed: {response.status_code} {response.text[:200]}", file=sys.stderr)
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, query, thread_id) for query, thread_id in zip(queries, thread_ids)))
+        seconds = time.perf_counter() - start
+    return latency_row("api", size, concurrency, latencies, errors, seconds)
+
+
+def bench_api(api, stores: dict, query_sets, concurrency_levels: list[int]) -> list[dict]:
+    """All API runs share one event loop, the app's request semaphore is bound to the loop it first waits on.
+    query_sets yields a fresh list of queries per run.
+    """
+    async def run_all():
+        return [await _bench_api(api, store, size, next(query_sets), concurrency)
+                for size, store in stores.items() for concurrency in concurrency_levels]
+    return asyncio.run(run_all())
+
+
+def fresh_queries(count: int):
+    """A new set of queries per run, so no run starts with embeddings / rerank results cached by an earlier one"""
+    seed = 1
+    while True:
+        yield make_queries(count, seed=seed)
+        seed += 1
+
+
+def format_report(ingestion_rows: list[dict], latency_rows: list[dict], rss_mb: float) -> str:
+    lines = [f"{'ingestion':<10}{'files':>8}{'pages':>8}{'chunks':>9}{'seconds':>10}{'chunks/s':>10}"]
+    for row in ingestion_rows:
+        lines.append(f"{row['size']:<10}{row['files']:>8}{row['pages']:>8}{row['chunks']:>9}"
+                     f"{row['seconds']:>10.2f}{row['chunks_per_s']:>10.1f}")
+    lines.append("")
+    lines.append(f"{'target':<8}{'size':<8}{'conc':>6}{'reqs':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+                 f"{'p99 ms':>10}{'req/s':>9}")
+    for row in latency_rows:
+        lines.append(f"{row['target']:<8}{row['size']:<8}{row['concurrency']:>6}{row['requests']:>7}{row['errors']:>8}"
+                     f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['req_per_s']:>9.2f}")
+    lines.append("")
+    lines.append(f"peak RSS: {rss_mb:.0f} MB")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of ingestion, graph and API on fake models")
+    parser.add_argument("--sizes", nargs="+", choices=list(CORPUS_SIZES), default=["small", "medium"])
+    parser.add_argument("--targets", nargs="+", choices=["graph", "api"], default=["graph", "api"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=50, help="requests per (target, size, concurrency)")
+    parser.add_argument("--workdir", help="folder for corpora, stores, caches and chat history (temp folder by default)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="rag-benchmark-"))
+    os.makedirs(workdir, exist_ok=True)
+    # before anything imports model_loader / embedding_cache, they read these at import time
+    os.environ.setdefault("MODEL_BACKEND", "fake")
+    os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(workdir, "embedding_cache", "embeddings.db"))
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)   # chat_hist/, Vectorstores/, temp_pdfs/ of the app are relative paths
+    print(f"benchmark workdir: {workdir}")
+
+    from src.agent.agentic_workflow import GraphBuilder, nodes
+
+    ingestion_rows, latency_rows, stores = [], [], {}
+    for size in args.sizes:
+        stores[size], row = bench_ingestion(nodes, size, workdir)
+        ingestion_rows.append(row)
+
+    query_sets = fresh_queries(args.requests)
+    if "graph" in args.targets:
+        app = GraphBuilder().build_graph()
+        for size in args.sizes:
+            for concurrency in args.concurrency:
+                latency_rows.append(bench_graph(app, stores[size], size, next(query_sets), concurrency))
+    if "api" in args.targets:
+        import backend.app as api
+        latency_rows += bench_api(api, stores, query_sets, args.concurrency)
+
+    rss_mb = peak_rss_mb()
+    print(format_report(ingestion_rows, latency_rows, rss_mb))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"ingestion": ingestion_rows, "latency": latency_rows, "peak_rss_mb": rss_mb,
+                       "fake_latency_ms": {name: os.getenv(name) for name in
+                                           ("FAKE_LLM_LATENCY_MS", "FAKE_TOKEN_LATENCY_MS",
+                                            "FAKE_EMBED_LATENCY_MS", "FAKE_RERANK_LATENCY_MS")}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Build or refresh a vectorstore from a folder of PDFs (used for the predefined Legal / Psychiatrist / Dermatology stores).
+
+Usage:
+    python -m src.ingestion.build_store --docs ./data/Legal --store ./vectorstores/Legal
+    python -m src.ingestion.build_store --docs ./data/Legal --store ./vectorstores/Legal --index ivf_pq --nprobe 32
+"""
+import argparse
+
+from src.vectorstore.index_spec import INDEX_KINDS, IndexSpec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or incrementally refresh a vectorstore")
+    parser.add_argument("--docs", required=True, help="PDF file or folder of PDFs")
+    parser.add_argument("--store", required=True, help="vectorstore folder")
+    parser.add_argument("--index", choices=INDEX_KINDS, help="index type, default keeps the saved one (flat for new stores)")
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=128)
+    parser.add_argument("--train-sample", type=int, default=100_000)
+    args = parser.parse_args()
+
+    index_spec = None
+    if args.index:
+        index_spec = IndexSpec(kind=args.index, nlist=args.nlist, nprobe=args.nprobe, pq_m=args.pq_m,
+                               hnsw_m=args.hnsw_m, ef_search=args.ef_search, train_sample=args.train_sample)
+
+    # imported here, loading the graph nodes needs the model API keys
+    from src.agent.agentic_workflow import nodes
+
+    job = nodes.ingestion.submit(documents_path=args.docs, vectorstore_path=args.store, index_spec=index_spec)
+    while not job.wait(timeout=5):
+        print(f"{job.status}: pages={job.pages_parsed} chunks={job.chunks_made} embedded={job.chunks_embedded}")
+    print(job.to_dict())
+
+
+if __name__ == "__main__":
+    main()
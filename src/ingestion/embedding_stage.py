@@ -0,0 +1,137 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "8000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))   # most embedding APIs cap the texts per request
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+RATE_LIMIT_MARKERS = ("429", "rate limit", "ratelimit", "quota", "resource exhausted", "resourceexhausted", "too many requests")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English, good enough for budgeting
+    return max(1, len(text) // 4)
+
+
+def batch_by_tokens(texts: list[str], max_tokens: int = EMBED_BATCH_TOKENS, max_items: int = EMBED_BATCH_SIZE):
+    """Split texts in consecutive [start, end) batches under the token budget and item limit"""
+    batches = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        text_tokens = estimate_tokens(text)
+        if i > start and (tokens + text_tokens > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += text_tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves on rate limit errors and grows back by one after a run of successes"""
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.active = 0
+        self.successes = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self.successes += 1
+            if self.limit < self.max_limit and self.successes >= self.limit:
+                self.limit += 1
+                self.successes = 0
+                self._condition.notify_all()
+
+    def on_rate_limit(self):
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
+
+
+class EmbeddingStage:
+    """Ingestion embedding: token budget batches, bounded concurrent requests with adaptive backoff.
+
+    Resume after an interrupted build comes from CachedEmbeddings: every finished batch is already in its
+    SQLite cache, so a rerun over the same chunks only sends the texts that were never embedded.
+    """
+
+    def __init__(self, embeddings, max_concurrency: int = EMBED_MAX_CONCURRENCY,
+                 max_tokens: int = EMBED_BATCH_TOKENS, max_items: int = EMBED_BATCH_SIZE,
+                 max_retries: int = EMBED_MAX_RETRIES):
+        self.embeddings = embeddings
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.max_retries = max_retries
+        self.limiter = AdaptiveLimiter(self.max_concurrency)
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.limiter:
+                    vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+                self.limiter.on_success()
+                break
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.limiter.on_rate_limit()
+                delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"Embedding rate limited, retry {attempt + 1} in {delay:.1f}s (concurrency {self.limiter.limit})")
+                time.sleep(delay)
+        return vectors
+
+    def embed(self, texts: list[str], on_progress=None) -> np.ndarray:
+        """Embed all texts, returns a float32 matrix in the same order.
+        on_progress(chunks_embedded=n) is called as batches finish, an exception raised there stops the stage.
+        """
+        batches = batch_by_tokens(texts, self.max_tokens, self.max_items)
+        results = [None] * len(batches)
+        done = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding")
+        try:
+            futures = {executor.submit(self._embed_batch, texts[start:end]): i
+                       for i, (start, end) in enumerate(batches)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                start, end = batches[i]
+                done += end - start
+                if on_progress is not None:
+                    on_progress(chunks_embedded=done)
+        finally:
+            # on error / cancellation drop the batches that did not start yet
+            executor.shutdown(wait=True, cancel_futures=True)
+        if not results:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(results)
@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_JOB_TTL_S = float(os.getenv("INGEST_JOB_TTL_S", "3600"))   # finished jobs are forgotten after this
+INGEST_MAX_FINISHED = int(os.getenv("INGEST_MAX_FINISHED", "200"))
+
+# job status values
+QUEUED, PARSING, SPLITTING, EMBEDDING, DONE, FAILED, CANCELLED = (
+    "queued", "parsing", "splitting", "embedding", "done", "failed", "cancelled")
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class IngestionCancelled(Exception):
+    pass
+
+
+@dataclass
+class IngestionJob:
+    documents_path: str
+    vectorstore_path: str
+    index_spec: object = None   # IndexSpec, None keeps the type the store was saved with
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    pages_parsed: int = 0
+    chunks_made: int = 0
+    chunks_embedded: int = 0
+    error: str = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise IngestionCancelled(self.job_id)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the job finished (done, failed or cancelled)"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {"job_id": self.job_id,
+                "status": self.status,
+                "documents_path": self.documents_path,
+                "vectorstore_path": self.vectorstore_path,
+                "pages_parsed": self.pages_parsed,
+                "chunks_made": self.chunks_made,
+                "chunks_embedded": self.chunks_embedded,
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at}
+
+
+class IngestionManager:
+    """Runs Document_Loader -> Text_Splitter -> Create_Vector_Store for uploaded PDFs as background jobs.
+
+    pipeline is the GraphNodes instance, so jobs use exactly the same loading/splitting/embedding code as the graph.
+    Finished jobs are dropped after INGEST_JOB_TTL_S or beyond INGEST_MAX_FINISHED (oldest first), except the
+    latest job of a store that did not finish with done, queries on that store still need its status.
+    """
+
+    def __init__(self, pipeline, max_workers: int = INGEST_WORKERS):
+        self.pipeline = pipeline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._jobs = {}           # {job_id: IngestionJob}
+        self._by_store = {}       # {abs vectorstore_path: latest job_id}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(vectorstore_path: str) -> str:
+        return os.path.abspath(vectorstore_path)
+
+    def submit(self, documents_path: str, vectorstore_path: str, index_spec=None) -> IngestionJob:
+        job = IngestionJob(documents_path=documents_path, vectorstore_path=vectorstore_path, index_spec=index_spec)
+        with self._lock:
+            self._prune()
+            # a new upload for the same store replaces the previous job
+            previous = self._jobs.get(self._by_store.get(self._key(vectorstore_path)))
+            if previous is not None:
+                previous.cancel()
+            self._jobs[job.job_id] = job
+            self._by_store[self._key(vectorstore_path)] = job.job_id
+        self.executor.submit(self._run, job, previous)
+        return job
+
+    def _prune(self):
+        """Forget old finished jobs, called with _lock held"""
+        latest = set(self._by_store.values())
+        finished = sorted((job for job in self._jobs.values() if job.status in FINISHED and job.finished_at is not None
+                           and not (job.job_id in latest and job.status != DONE)),
+                          key=lambda job: job.finished_at)
+        expired = [job for job in finished if time.time() - job.finished_at > INGEST_JOB_TTL_S]
+        expired += finished[len(expired):max(len(expired), len(finished) - INGEST_MAX_FINISHED)]
+        for job in expired:
+            del self._jobs[job.job_id]
+            key = self._key(job.vectorstore_path)
+            if self._by_store.get(key) == job.job_id:
+                del self._by_store[key]
+
+    def get(self, job_id: str) -> IngestionJob:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, vectorstore_path: str) -> IngestionJob:
+        """Latest job that builds vectorstore_path, None if the store was never ingested in background"""
+        with self._lock:
+            return self._jobs.get(self._by_store.get(self._key(vectorstore_path)))
+
+    def cancel(self, job_id: str) -> IngestionJob:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _run(self, job: IngestionJob, previous: IngestionJob = None):
+        if previous is not None:
+            previous.wait()   # never let two builds write the same folder
+        try:
+            job.check_cancelled()
+            diff = self.pipeline.store_diff(job.documents_path, job.vectorstore_path, job.index_spec)
+            if diff.is_empty:
+                job.status = DONE
+                return
+
+            job.status = PARSING
+            documents = []
+            for document in self.pipeline.load_documents(diff.files_to_parse):
+                job.check_cancelled()
+                documents.append(document)
+                job.pages_parsed += 1
+
+            job.status = SPLITTING
+            chunks = self.pipeline.split_documents(documents)
+            job.chunks_made = len(chunks)
+
+            job.status = EMBEDDING
+
+            def on_progress(**counts):
+                for name, value in counts.items():
+                    setattr(job, name, value)
+                job.check_cancelled()
+
+            self.pipeline.update_vector_store(chunks, diff, job.vectorstore_path, on_progress=on_progress,
+                                              index_spec=job.index_spec)
+            job.status = DONE
+            logger.info(f"Ingestion job {job.job_id} finished: {job.chunks_made} chunks in {job.vectorstore_path}")
+        except IngestionCancelled:
+            job.status = CANCELLED
+            logger.info(f"Ingestion job {job.job_id} cancelled")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
@@ -0,0 +1,87 @@
+import glob
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+
+
+def parse_page_range(file_path: str, start: int, end: int) -> list[Document]:
+    """Extract pages [start, end) of one PDF. Runs inside a worker process.
+    Metadata matches what PyPDFLoader gives (source, page, page_label, total_pages).
+    """
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    page_labels = reader.page_labels
+    documents = []
+    for page_number in range(start, min(end, total_pages)):
+        page = reader.pages[page_number]
+        metadata = {"source": file_path,
+                    "page": page_number,
+                    "page_label": page_labels[page_number] if page_number < len(page_labels) else str(page_number + 1),
+                    "total_pages": total_pages}
+        documents.append(Document(page_content=page.extract_text(), metadata=metadata))
+    return documents
+
+
+def list_pdfs(path) -> list[str]:
+    """Absolute paths of the PDFs to parse, path is a PDF file, a directory of PDFs or a list of PDF files"""
+    if isinstance(path, (list, tuple)):
+        return [os.path.abspath(file_path) for file_path in path]
+    path = os.path.abspath(path)
+    if os.path.isfile(path):  # single PDF case
+        return [path]
+    if os.path.isdir(path):   # directory case (same as DirectoryLoader(glob="*.pdf"))
+        return sorted(glob.glob(os.path.join(path, "*.pdf")))
+    raise ValueError(f"Invalid documents_path: {path}")
+
+
+class ParallelPDFLoader:
+    """Parse PDFs in several processes, big PDFs are split in page ranges.
+
+    lazy_load() yields Documents in file/page order while later ranges are still being parsed,
+    at most max_workers * 2 ranges are in flight so memory stays bounded on big corpora.
+    """
+
+    def __init__(self, path, max_workers: int = PDF_PARSE_WORKERS, pages_per_task: int = PAGES_PER_TASK):
+        self.path = path
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+
+    def _tasks(self):
+        for file_path in list_pdfs(self.path):
+            total_pages = len(PdfReader(file_path).pages)
+            for start in range(0, total_pages, self.pages_per_task):
+                yield file_path, start, start + self.pages_per_task
+
+    def lazy_load(self):
+        tasks = list(self._tasks())
+        # not worth starting processes for a small PDF
+        if self.max_workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield from parse_page_range(*task)
+            return
+
+        # spawn so worker processes do not inherit the server threads/locks
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks)), mp_context=context) as pool:
+            pending = deque()
+            tasks = iter(tasks)
+            for task in tasks:
+                pending.append(pool.submit(parse_page_range, *task))
+                if len(pending) >= self.max_workers * 2:
+                    break
+            while pending:
+                documents = pending.popleft().result()
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    pending.append(pool.submit(parse_page_range, *next_task))
+                yield from documents
+
+    def load(self) -> list[Document]:
+        return list(self.lazy_load())
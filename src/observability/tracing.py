@@ -0,0 +1,155 @@
+import contextvars
+import functools
+import inspect
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = REGISTRY.histogram("rag_stage_seconds", "Latency of graph nodes, model calls and checkpoint operations")
+STAGE_ERRORS = REGISTRY.counter("rag_stage_errors_total", "Graph nodes, model calls and checkpoint operations that raised")
+REQUEST_SECONDS = REGISTRY.histogram("rag_request_seconds", "End to end latency of one graph run")
+LLM_TOKENS = REGISTRY.counter("rag_llm_tokens_total", "LLM tokens by model and direction (input / output)")
+
+# trace of the graph run on this thread (LangGraph copies the context into the threads it runs nodes in)
+_current_trace = contextvars.ContextVar("rag_trace", default=None)
+
+
+@dataclass
+class Trace:
+    """Timings of one request: every instrumented call made while it was current, in the order they finished"""
+    trace_id: str
+    spans: list = field(default_factory=list)     # [{"name", "kind", "ms"}]
+    tokens: dict = field(default_factory=dict)    # {model: {"input": n, "output": n}}
+    total_ms: float = 0.0
+
+    def add_span(self, name: str, kind: str, seconds: float):
+        self.spans.append({"name": name, "kind": kind, "ms": round(seconds * 1000, 2)})
+
+    def add_tokens(self, model: str, input_tokens: int, output_tokens: int):
+        counts = self.tokens.setdefault(model, {"input": 0, "output": 0})
+        counts["input"] += input_tokens
+        counts["output"] += output_tokens
+
+    def breakdown(self) -> dict:
+        by_name = {}
+        for span in self.spans:
+            by_name[span["name"]] = round(by_name.get(span["name"], 0.0) + span["ms"], 2)
+        return {"trace_id": self.trace_id,
+                "total_ms": self.total_ms,
+                "by_name": by_name,   # nodes include the model calls made inside them
+                "spans": list(self.spans),
+                "tokens": self.tokens}
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(trace_id: str = None, route: str = "query"):
+    """Make a new Trace current for everything run inside the block (call it on the thread that runs the graph)"""
+    trace = Trace(trace_id=trace_id or uuid.uuid4().hex)
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        seconds = time.perf_counter() - start
+        trace.total_ms = round(seconds * 1000, 2)
+        REQUEST_SECONDS.observe(seconds, route=route)
+        _current_trace.reset(token)
+        logger.info(f"trace {trace.trace_id} {route} {trace.total_ms}ms {trace.breakdown()['by_name']}")
+
+
+@contextmanager
+def timed(name: str, kind: str):
+    """Record the duration of the block in rag_stage_seconds and on the current trace"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(kind=kind, name=name)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, kind=kind, name=name)
+        trace = current_trace()
+        if trace is not None:
+            trace.add_span(name, kind, seconds)
+
+
+def _timed_function(fn, name: str, kind: str):
+    @functools.wraps(fn)   # keeps the signature, LangGraph inspects it to decide what to pass to a node
+    def wrapper(*args, **kwargs):
+        with timed(name, kind):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def instrument_methods(obj, kind: str, names: list[str] = None, prefix: str = ""):
+    """Replace methods of obj (all public ones when names is None) by timed wrappers, on this instance only.
+    Generator methods are left alone, their time is spent by whoever iterates them.
+    """
+    for name in names or [name for name in dir(type(obj)) if not name.startswith("_")]:
+        method = getattr(obj, name, None)
+        if not (inspect.ismethod(method) or inspect.isfunction(method)) or inspect.isgeneratorfunction(method):
+            continue
+        setattr(obj, name, _timed_function(method, prefix + name, kind))
+    return obj
+
+
+class ModelMetricsCallback(BaseCallbackHandler):
+    """LangChain callback recording latency and token usage of every call of a chat model"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._starts = {}   # {run_id: perf_counter at start}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        trace = current_trace()
+        if start is not None:
+            seconds = time.perf_counter() - start
+            STAGE_SECONDS.observe(seconds, kind="model", name=self.model_name)
+            if trace is not None:
+                trace.add_span(self.model_name, "model", seconds)
+
+        input_tokens, output_tokens = self._usage(response)
+        if input_tokens or output_tokens:
+            LLM_TOKENS.inc(input_tokens, model=self.model_name, direction="input")
+            LLM_TOKENS.inc(output_tokens, model=self.model_name, direction="output")
+            if trace is not None:
+                trace.add_tokens(self.model_name, input_tokens, output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+        STAGE_ERRORS.inc(kind="model", name=self.model_name)
+
+    @staticmethod
+    def _usage(response) -> tuple[int, int]:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        if not (input_tokens or output_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+        return input_tokens, output_tokens
@@ -25,3 +25,40 @@ Now provide the best possible answer:
 input_variables=["context", "question","history"]
 )
 
+
+
+# used to fold new conversation turns into the running per-thread summary
+summary_prompt_template = PromptTemplate(template = """
+Progressively summarize the lines of conversation provided, adding onto the previous summary and returning a new summary.
+Keep facts the user shared, the questions asked and the key points of the answers. Be concise.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:
+""",
+input_variables=["summary", "new_lines"]
+)
+
+
+
+# used when the query router skipped retrieval (greetings, thanks, follow-ups about the previous answer)
+chat_prompt_template = PromptTemplate(template = """
+You are a helpful assistant that answers questions about the user's documents.
+No documents were retrieved for this message because it is small talk or about the conversation so far.
+Here is past conversation:
+{history}
+
+User message:
+{question}
+
+Instructions:
+- Reply briefly and naturally to greetings, thanks and small talk.
+- For requests about an earlier answer (rephrase, shorten, translate, explain again) use only the conversation above.
+- If the message actually needs information that is not in the conversation, say so and ask the user to rephrase it as a question.
+""",
+input_variables=["question","history"]
+)
@@ -0,0 +1,116 @@
+"""Latency, agreement and (with labels) relevance of the rerank backends on the same retrieved candidates.
+
+agreement@n is the share of the first backend's top n that another backend also puts in its top n. It measures
+how close a backend is to the reference (Cohere by default), not whether it is better. For quality pass --qrels,
+a JSONL file of labeled queries: {"query": "...", "relevant_ids": [docstore ids], "relevant_text": [snippets]}.
+A candidate is relevant when its id is listed or its text contains one of the snippets, and every backend gets
+precision@n and MRR against those labels.
+
+Usage:
+    python -m src.rerank.benchmark --store ./vectorstores/Legal --queries questions.txt
+    python -m src.rerank.benchmark --store ./vectorstores/Legal --qrels labeled.jsonl --backends cohere cross_encoder fusion --candidates 20
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.rerank.rerankers import candidate_key, load_reranker
+
+
+def rerank_timed(reranker, query: str, candidates: list) -> tuple[list[str], float]:
+    """(ranked candidate ids, latency in ms)"""
+    start = time.perf_counter()
+    ranking = reranker.rerank(query, candidates)
+    latency = (time.perf_counter() - start) * 1000
+    return [candidate_key(candidates[index]) for index, _ in ranking], latency
+
+
+def relevant_keys(candidates: list, label: dict) -> set:
+    """Ids of the candidates a label marks as relevant"""
+    ids = set(label.get("relevant_ids") or [])
+    snippets = [snippet.lower() for snippet in label.get("relevant_text") or []]
+    return {candidate_key(doc) for doc in candidates
+            if candidate_key(doc) in ids or any(snippet in doc.page_content.lower() for snippet in snippets)}
+
+
+def reciprocal_rank(ranked: list[str], relevant: set) -> float:
+    return next((1.0 / rank for rank, key in enumerate(ranked, start=1) if key in relevant), 0.0)
+
+
+def compare_backends(rerankers: dict, candidate_sets: list[tuple], top_n: int = 3) -> list[dict]:
+    """Run every backend over the same (query, candidates[, label]) tuples, one row per backend.
+    precision / mrr are only filled in when the tuples carry labels.
+    """
+    rankings = {name: [] for name in rerankers}
+    latencies = {name: [] for name in rerankers}
+    for query, candidates, *_ in candidate_sets:
+        for name, reranker in rerankers.items():
+            ranked, latency = rerank_timed(reranker, query, candidates)
+            rankings[name].append(ranked)
+            latencies[name].append(latency)
+
+    labeled = [relevant_keys(candidates, rest[0]) if rest else None for _, candidates, *rest in candidate_sets]
+    reference = next(iter(rerankers))
+    rows = []
+    for name in rerankers:
+        agreement = [len(set(ranked[:top_n]) & set(expected[:top_n])) / top_n
+                     for ranked, expected in zip(rankings[name], rankings[reference])]
+        row = {"backend": name, "agreement": float(np.mean(agreement)) if agreement else 0.0,
+               "precision": None, "mrr": None,
+               "mean_ms": float(np.mean(latencies[name])), "p95_ms": float(np.percentile(latencies[name], 95))}
+        scored = [(ranked, relevant) for ranked, relevant in zip(rankings[name], labeled) if relevant is not None]
+        if scored:
+            row["precision"] = float(np.mean([len(set(ranked[:top_n]) & relevant) / top_n for ranked, relevant in scored]))
+            row["mrr"] = float(np.mean([reciprocal_rank(ranked, relevant) for ranked, relevant in scored]))
+        rows.append(row)
+    return rows
+
+
+def format_report(rows: list[dict], top_n: int) -> str:
+    def cell(value):
+        return f"{value:>12.3f}" if value is not None else f"{'-':>12}"
+
+    lines = [f"{'backend':<16}{'agreement@' + str(top_n):>14}{'precision@' + str(top_n):>12}{'mrr':>12}"
+             f"{'mean ms':>10}{'p95 ms':>10}"]
+    for row in rows:
+        lines.append(f"{row['backend']:<16}{row['agreement']:>14.3f}{cell(row['precision'])}{cell(row['mrr'])}"
+                     f"{row['mean_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rerank backends on candidates retrieved from a store")
+    parser.add_argument("--store", required=True, help="vectorstore folder")
+    queries = parser.add_mutually_exclusive_group(required=True)
+    queries.add_argument("--queries", help="text file with one question per line (agreement and latency only)")
+    queries.add_argument("--qrels", help="JSONL of labeled queries, adds precision@n and MRR")
+    parser.add_argument("--backends", nargs="+", default=["cohere", "cross_encoder", "fusion"],
+                        help="first one is the reference ranking for agreement")
+    parser.add_argument("--candidates", type=int, default=10, help="retrieved chunks reranked per query")
+    parser.add_argument("--top-n", type=int, default=3)
+    args = parser.parse_args()
+
+    from src.agent.model_loader import EMBEDDER
+    from src.vectorstore.store_cache import VectorStoreCache
+
+    if args.qrels:
+        with open(args.qrels, encoding="utf-8") as f:
+            labels = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(args.queries, encoding="utf-8") as f:
+            labels = [{"query": line.strip()} for line in f if line.strip()]
+    vector_store = VectorStoreCache(EMBEDDER).get(args.store).dense
+    candidate_sets = []
+    for label in labels:
+        candidates = vector_store.similarity_search(label["query"], k=args.candidates)
+        candidate_sets.append((label["query"], candidates, label) if args.qrels else (label["query"], candidates))
+
+    # no CachedReranker here, every call has to hit the backend
+    rerankers = {backend: load_reranker(backend, top_n=args.top_n) for backend in args.backends}
+    print(format_report(compare_backends(rerankers, candidate_sets, top_n=args.top_n), args.top_n))
+
+
+if __name__ == "__main__":
+    main()
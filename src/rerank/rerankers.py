@@ -0,0 +1,151 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+from pydantic import ConfigDict, PrivateAttr
+
+from src.observability.tracing import timed
+
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "cohere")   # cohere | cross_encoder | fusion
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class Reranker(BaseDocumentCompressor):
+    """Common interface of the rerank backends used in the compression pipeline.
+
+    Backends only implement rerank(query, documents) -> [(index, score)] best first,
+    compress_documents keeps the top_n and writes relevance_score in the metadata (like CohereRerank does).
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    top_n: int = 3
+
+    def rerank(self, query: str, documents: Sequence[Document]) -> list[tuple[int, float]]:
+        raise NotImplementedError
+
+    def compress_documents(self, documents: Sequence[Document], query: str,
+                           callbacks: Optional[Callbacks] = None) -> Sequence[Document]:
+        documents = list(documents)
+        if not documents:
+            return []
+        compressed = []
+        for index, score in self.rerank(query, documents)[:self.top_n]:
+            doc = documents[index]
+            # keep doc.id, the redundancy filter uses it to find the stored vector
+            compressed.append(Document(id=doc.id, page_content=doc.page_content,
+                                       metadata={**doc.metadata, "relevance_score": score}))
+        return compressed
+
+
+class CohereReranker(Reranker):
+    """Cohere rerank API (rerank-english-v3.0)"""
+
+    client: object   # langchain_cohere.CohereRerank
+
+    def rerank(self, query, documents):
+        results = self.client.rerank(documents=[doc.page_content for doc in documents], query=query,
+                                     top_n=len(documents))
+        return [(result["index"], float(result["relevance_score"])) for result in results]
+
+
+class CrossEncoderReranker(Reranker):
+    """Local CPU cross-encoder (sentence-transformers), no network call and no quota"""
+
+    model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    _model: object = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError as e:
+                    raise ImportError("CrossEncoderReranker needs sentence-transformers: pip install sentence-transformers") from e
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def rerank(self, query, documents):
+        scores = self._load().predict([(query, doc.page_content) for doc in documents])
+        return sorted(((i, float(score)) for i, score in enumerate(scores)), key=lambda item: -item[1])
+
+
+class ScoreFusionReranker(Reranker):
+    """No model at all: reciprocal rank fusion of the retriever order and query term overlap.
+    Useful when the rerank API is slow or out of quota, quality stays close to the hybrid retriever order.
+    """
+
+    rrf_k: int = 60
+
+    def rerank(self, query, documents):
+        query_terms = set(TOKEN_PATTERN.findall(query.lower()))
+        overlap = []
+        for doc in documents:
+            doc_terms = set(TOKEN_PATTERN.findall(doc.page_content.lower()))
+            overlap.append(len(query_terms & doc_terms) / (len(query_terms) or 1))
+        by_overlap = sorted(range(len(documents)), key=lambda i: -overlap[i])
+        overlap_rank = {index: rank for rank, index in enumerate(by_overlap)}
+        scores = [1 / (self.rrf_k + i + 1) + 1 / (self.rrf_k + overlap_rank[i] + 1) for i in range(len(documents))]
+        return sorted(((i, score) for i, score in enumerate(scores)), key=lambda item: -item[1])
+
+
+def candidate_key(doc: Document) -> str:
+    """Stable id of a candidate: docstore id if known, else hash of its text"""
+    return doc.id or doc.metadata.get("docstore_id") or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class CachedReranker(Reranker):
+    """LRU cache in front of any backend, keyed by query hash + candidate ids (same query + same candidates = same ranking)"""
+
+    reranker: Reranker
+    max_entries: int = RERANK_CACHE_SIZE
+    _cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    hits: int = 0
+    misses: int = 0
+
+    def rerank(self, query, documents):
+        query_hash = hashlib.sha256(query.strip().lower().encode("utf-8")).hexdigest()
+        key = (type(self.reranker).__name__, query_hash, tuple(candidate_key(doc) for doc in documents))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+        with timed(f"rerank:{type(self.reranker).__name__}", "model"):
+            ranking = self.reranker.rerank(query, documents)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = ranking
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return ranking
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"backend": type(self.reranker).__name__,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "entries": len(self._cache)}
+
+
+def load_reranker(backend: str = RERANKER_BACKEND, top_n: int = 3) -> Reranker:
+    """Build a rerank backend by name: cohere | cross_encoder | fusion"""
+    if backend == "cohere":
+        from langchain_cohere import CohereRerank
+        return CohereReranker(client=CohereRerank(model="rerank-english-v3.0"), top_n=top_n)
+    if backend == "cross_encoder":
+        return CrossEncoderReranker(top_n=top_n)
+    if backend == "fusion":
+        return ScoreFusionReranker(top_n=top_n)
+    raise ValueError(f"Unknown reranker backend: {backend}")
@@ -0,0 +1,113 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+from langchain_community.document_transformers import LongContextReorder
+
+from src.rerank.rerankers import candidate_key
+from src.retrieval.hybrid import dense_doc_ids, documents_for_ids, weighted_rrf
+from src.vectorstore.redundancy import FaissRedundantFilter
+
+logger = logging.getLogger(__name__)
+
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+BATCH_RERANK_CONCURRENCY = int(os.getenv("BATCH_RERANK_CONCURRENCY", "8"))
+BATCH_RETRIEVAL_SIZE = int(os.getenv("BATCH_RETRIEVAL_SIZE", "256"))   # queries per embedding call / FAISS matrix search
+
+
+class BatchQueryRunner:
+    """Answers many independent questions (evaluation sets, offline jobs) with the retrieval stages batched per store.
+
+    per store, BATCH_RETRIEVAL_SIZE queries at a time:
+        one query embedding call -> one FAISS matrix search -> BM25 + RRF per query -> one docstore read
+        -> rerank calls in a bounded pool (repeated query + candidates answered by the rerank cache)
+        -> redundancy filter + reorder
+    answers are generated with at most llm_concurrency LLM calls in flight and yielded as they finish.
+    Items are stateless: no thread history is used and nothing is written to the checkpoint.
+    """
+
+    def __init__(self, nodes, llm, llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+                 rerank_concurrency: int = BATCH_RERANK_CONCURRENCY, retrieval_size: int = BATCH_RETRIEVAL_SIZE):
+        self.nodes = nodes
+        self.llm = llm
+        self.llm_concurrency = llm_concurrency
+        self.rerank_concurrency = rerank_concurrency
+        self.retrieval_size = retrieval_size
+
+    def retrieve(self, vectorstore_path: str, queries: list[str]) -> list[list]:
+        """Context documents for every query of one store, same order as queries"""
+        job = self.nodes.ingestion.find(vectorstore_path)   # uploaded PDF still being ingested
+        if job is not None:
+            job.wait()
+        loaded = self.nodes.store_cache.get(vectorstore_path)
+        fusion = loaded.fusion
+
+        vectors = np.asarray(self.nodes.embedding_model.embed_queries(queries), dtype=np.float32)
+        _, rows = loaded.dense.index.search(vectors, fusion.dense_k)
+        dense_ids = dense_doc_ids(loaded, rows)
+
+        fused_ids = []
+        for query, ids in zip(queries, dense_ids):
+            sparse_ids = [doc_id for doc_id, _ in loaded.sparse.search(query, k=fusion.sparse_k)]
+            fused, _ = weighted_rrf([ids, sparse_ids], fusion.weights(query), rrf_k=fusion.rrf_k)
+            fused_ids.append(fused.tolist())
+
+        # every candidate of the batch read from the docstore at once
+        unique_ids = list(dict.fromkeys(doc_id for ids in fused_ids for doc_id in ids))
+        documents = {candidate_key(doc): doc for doc in documents_for_ids(loaded.dense.docstore, unique_ids)}
+        candidates = [[documents[doc_id] for doc_id in ids if doc_id in documents] for ids in fused_ids]
+
+        reranker = self.nodes.reranker_model
+        with ThreadPoolExecutor(max_workers=self.rerank_concurrency, thread_name_prefix="batch-rerank") as pool:
+            reranked = list(pool.map(lambda pair: list(reranker.compress_documents(pair[1], pair[0])),
+                                     zip(queries, candidates)))
+
+        redundancy = FaissRedundantFilter(loaded_store=loaded, embeddings=self.nodes.embedding_model)
+        reordering = LongContextReorder()
+        return [list(reordering.transform_documents(redundancy.transform_documents(docs))) for docs in reranked]
+
+    def _answer(self, item: dict, docs: list) -> dict:
+        response = self.llm.invoke(self.nodes.format_prompt(item["query"], docs))
+        return {"answer": response.content, "sources": self.nodes.document_refs(docs)}
+
+    @staticmethod
+    def _result(index: int, item: dict, **fields) -> dict:
+        return {"index": index, "id": item.get("id"), "query": item["query"],
+                "vectorstore_path": item["vectorstore_path"], **fields}
+
+    def run(self, items: list[dict]):
+        """items: [{"query", "vectorstore_path", optional "id"}], yields one result dict per item as it completes
+        ({"index", "id", "query", "vectorstore_path", "answer", "sources"} or "error" instead of answer / sources)
+        """
+        by_store = {}
+        for index, item in enumerate(items):
+            by_store.setdefault(item["vectorstore_path"], []).append(index)
+
+        with ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix="batch-llm") as llm_pool:
+            pending = {}
+            for vectorstore_path, indexes in by_store.items():
+                for start in range(0, len(indexes), self.retrieval_size):
+                    group = indexes[start:start + self.retrieval_size]
+                    try:
+                        contexts = self.retrieve(vectorstore_path, [items[index]["query"] for index in group])
+                    except Exception as e:
+                        logger.warning(f"Batch retrieval failed for {vectorstore_path}: {e}")
+                        for index in group:
+                            yield self._result(index, items[index], error=str(e))
+                        continue
+                    # generation of this group overlaps with retrieval of the next one
+                    for index, docs in zip(group, contexts):
+                        pending[llm_pool.submit(self._answer, items[index], docs)] = index
+                    # hand back what is already answered before retrieving the next group
+                    for future in [future for future in pending if future.done()]:
+                        yield self._finish(future, pending.pop(future), items)
+
+            for future in as_completed(list(pending)):
+                yield self._finish(future, pending.pop(future), items)
+
+    def _finish(self, future, index: int, items: list[dict]) -> dict:
+        try:
+            return self._result(index, items[index], **future.result())
+        except Exception as e:
+            return self._result(index, items[index], error=str(e))
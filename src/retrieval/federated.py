@@ -0,0 +1,111 @@
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from src.retrieval.hybrid import documents_for_ids, row_doc_ids
+from src.vectorstore.fusion import FusionParams
+
+logger = logging.getLogger(__name__)
+
+FEDERATED_MAX_CANDIDATES = int(os.getenv("FEDERATED_MAX_CANDIDATES", "20"))   # merged candidates sent to rerank
+
+# one search (and first time load) per store, dozens of stores are searched side by side
+_federated_executor = ThreadPoolExecutor(max_workers=int(os.getenv("FEDERATED_SEARCH_WORKERS", "16")),
+                                         thread_name_prefix="federated-search")
+
+
+def _map(fn, items: list):
+    """executor.map keeping the caller's context (request trace)"""
+    futures = [_federated_executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def load_stores(store_cache, paths: list[str]) -> dict:
+    """{path: LoadedStore} for every path, stores not cached yet are loaded in parallel.
+    A missing extra store (build cancelled or failed after the request was accepted) is skipped, a missing first
+    (primary) store still raises FileNotFoundError.
+    """
+    def load(path):
+        try:
+            return store_cache.get(path)
+        except FileNotFoundError:
+            if path == paths[0]:
+                raise
+            logger.warning(f"Vectorstore not found, left out of the federated query: {path}")
+            return None
+
+    return {path: store for path, store in zip(paths, _map(load, paths)) if store is not None}
+
+
+def minmax(scores) -> np.ndarray:
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(scores):
+        return scores
+    span = scores.max() - scores.min()
+    return (scores - scores.min()) / span if span > 0 else np.ones_like(scores)
+
+
+class FederatedRetriever(BaseRetriever):
+    """Hybrid retrieval over several stores in one query, every store searched in parallel.
+
+    Scores are made comparable before merging: dense similarities are min-max normalised over all stores together
+    (every store uses the same embedding model, so distances share one space), BM25 scores per store (IDF depends on
+    the corpus). Each candidate gets weight_dense * dense + weight_sparse * sparse, the best max_candidates of the
+    union go on to rerank. Results carry metadata["source_store"] (and "federated_score").
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    stores: dict                  # {vectorstore_path: LoadedStore}
+    embeddings: object
+    max_candidates: int = FEDERATED_MAX_CANDIDATES
+    fusion: FusionParams = None   # weights for merging, default FusionParams()
+    k: int = None                 # dense / sparse candidates per store, None = each store's fusion.json
+
+    def _search_store(self, path: str, query: str, vector: np.ndarray):
+        loaded = self.stores[path]
+        distances, rows = loaded.dense.index.search(vector[None, :], self.k or loaded.fusion.dense_k)
+        row_to_id = row_doc_ids(loaded, rows)
+        dense = [(row_to_id[int(row)], float(distance)) for row, distance in zip(rows[0], distances[0])
+                 if int(row) in row_to_id]
+        sparse = loaded.sparse.search(query, k=self.k or loaded.fusion.sparse_k)
+        return dense, sparse
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        paths = list(self.stores)
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)   # one embedding for every store
+        results = _map(lambda path: self._search_store(path, query, vector), paths)
+
+        weight_dense, weight_sparse = (self.fusion or FusionParams()).weights(query)
+        scores = {}   # {(path, doc_id): combined score}
+
+        dense_keys = [(path, doc_id) for path, (dense, _) in zip(paths, results) for doc_id, _ in dense]
+        dense_similarity = minmax([-distance for dense, _ in results for _, distance in dense])
+        for key, score in zip(dense_keys, dense_similarity):
+            scores[key] = scores.get(key, 0.0) + weight_dense * score
+        for path, (_, sparse) in zip(paths, results):
+            for (doc_id, _), score in zip(sparse, minmax([score for _, score in sparse])):
+                scores[(path, doc_id)] = scores.get((path, doc_id), 0.0) + weight_sparse * score
+
+        best = sorted(scores, key=scores.get, reverse=True)[:self.max_candidates]
+        documents = {}
+        for path in paths:
+            doc_ids = [doc_id for store, doc_id in best if store == path]
+            for doc in documents_for_ids(self.stores[path].dense.docstore, doc_ids):
+                documents[(path, doc.id or doc.metadata.get("docstore_id"))] = doc
+
+        merged = []
+        for key in best:
+            doc = documents.get(key)
+            if doc is not None:
+                merged.append(Document(id=doc.id, page_content=doc.page_content,
+                                       metadata={**doc.metadata, "source_store": key[0],
+                                                 "federated_score": round(scores[key], 4)}))
+        return merged
@@ -0,0 +1,99 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from src.rerank.rerankers import candidate_key
+from src.vectorstore.fusion import FusionParams
+
+# dense (query embedding + FAISS) and sparse (BM25) searches of one query run side by side here
+_search_executor = ThreadPoolExecutor(max_workers=int(os.getenv("HYBRID_SEARCH_WORKERS", "8")),
+                                      thread_name_prefix="hybrid-search")
+
+
+def weighted_rrf(ranked_ids: list, weights, rrf_k: int = 60) -> tuple[np.ndarray, np.ndarray]:
+    """Weighted reciprocal rank fusion of several ranked id lists.
+
+    score(id) = sum over lists of weight / (rrf_k + rank + 1), returns (ids, scores) best first.
+    Ties go to the id with the best rank in any list, then to the one seen first (list order), never to the id itself.
+    """
+    ranked_ids = [np.asarray(ids, dtype=str) for ids in ranked_ids]
+    sizes = [len(ids) for ids in ranked_ids]
+    if not sum(sizes):
+        return np.empty(0, dtype=str), np.empty(0, dtype=np.float64)
+    all_ids = np.concatenate(ranked_ids)
+    ranks = np.concatenate([np.arange(size) for size in sizes])
+    contributions = np.repeat(np.asarray(weights, dtype=np.float64), sizes) / (rrf_k + ranks + 1)
+    unique_ids, first_seen, inverse = np.unique(all_ids, return_index=True, return_inverse=True)
+    scores = np.bincount(inverse, weights=contributions, minlength=len(unique_ids))
+    best_rank = np.full(len(unique_ids), ranks.max() + 1)
+    np.minimum.at(best_rank, inverse, ranks)
+    order = np.lexsort((first_seen, best_rank, -scores))   # last key sorts first
+    return unique_ids[order], scores[order]
+
+
+def documents_for_ids(docstore, doc_ids, known: dict = None) -> list[Document]:
+    """Documents in doc_ids order, taken from known ({id: Document}) first and the docstore for the rest"""
+    known = dict(known or {})
+    missing = [doc_id for doc_id in doc_ids if doc_id not in known]
+    if missing:
+        found = docstore.mget(missing) if hasattr(docstore, "mget") else [docstore.search(doc_id) for doc_id in missing]
+        known.update({candidate_key(doc): doc for doc in found if isinstance(doc, Document)})
+    return [known[doc_id] for doc_id in doc_ids if doc_id in known]
+
+
+def row_doc_ids(loaded_store, rows) -> dict:
+    """{FAISS row: docstore id} for many rows in one lookup (-1 and unknown rows are left out)"""
+    docstore = loaded_store.dense.docstore
+    wanted = [int(row) for row in np.unique(rows) if row >= 0]
+    if hasattr(docstore, "doc_ids"):
+        return docstore.doc_ids(wanted)
+    mapping = loaded_store.dense.index_to_docstore_id
+    return {row: mapping[row] for row in wanted if row in mapping}
+
+
+def dense_doc_ids(loaded_store, rows: np.ndarray) -> list[list[str]]:
+    """FAISS result rows (queries x k, -1 = no hit) -> docstore ids per query"""
+    row_to_id = row_doc_ids(loaded_store, rows)
+    return [[row_to_id[int(row)] for row in query_rows if int(row) in row_to_id] for query_rows in rows]
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense + sparse retrieval over one loaded store, both searches run in parallel and are fused with weighted RRF.
+
+    Fusion parameters (k per side, rrf_k, weights for short / long queries) come from the store's fusion.json,
+    params overrides them for this retriever only.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    loaded_store: object          # vectorstore.store_cache.LoadedStore
+    params: FusionParams = None
+
+    @property
+    def fusion(self) -> FusionParams:
+        return self.params or self.loaded_store.fusion
+
+    def dense_search(self, query: str, k: int) -> list[Document]:
+        return self.loaded_store.dense.similarity_search(query, k=k)
+
+    def sparse_search(self, query: str, k: int) -> list[str]:
+        return [doc_id for doc_id, _ in self.loaded_store.sparse.search(query, k=k)]
+
+    def fuse(self, query: str, dense_docs: list[Document], sparse_ids: list[str]) -> list[Document]:
+        fusion = self.fusion
+        dense_ids = [candidate_key(doc) for doc in dense_docs]
+        fused_ids, _ = weighted_rrf([dense_ids, sparse_ids], fusion.weights(query), rrf_k=fusion.rrf_k)
+        return documents_for_ids(self.loaded_store.dense.docstore, fused_ids.tolist(),
+                                 known=dict(zip(dense_ids, dense_docs)))
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        fusion = self.fusion
+        sparse = _search_executor.submit(contextvars.copy_context().run, self.sparse_search, query, fusion.sparse_k)
+        dense_docs = self.dense_search(query, fusion.dense_k)   # embedding call, the slow side, runs on this thread
+        return self.fuse(query, dense_docs, sparse.result())
@@ -0,0 +1,114 @@
+import os
+import re
+from dataclasses import asdict, dataclass, field
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "0") == "1"   # off by default, auto_route=True turns it on per request
+ROUTER_SWITCH_MARGIN = float(os.getenv("ROUTER_SWITCH_MARGIN", "0.1"))     # another store must beat the thread's store by this
+ROUTER_STORE_MARGIN = float(os.getenv("ROUTER_STORE_MARGIN", "0.03"))      # stores this close to the best are searched too
+ROUTER_MAX_STORES = int(os.getenv("ROUTER_MAX_STORES", "3"))
+ROUTER_SHALLOW_K = int(os.getenv("ROUTER_SHALLOW_K", "3"))
+ROUTER_DEEP_K = int(os.getenv("ROUTER_DEEP_K", "10"))
+
+RETRIEVE, SKIP = "retrieve", "skip"
+
+CHIT_CHAT = re.compile(
+    r"^\W*(hi|hello|hey|yo|hiya|good (morning|afternoon|evening)|thanks?( you)?( so much| a lot)?|thx|ty|cheers"
+    r"|ok(ay)?|cool|great|nice|perfect|got it|bye|goodbye|see you|how are you( doing)?|who are you|what can you do)"
+    r"(\W+(there|again|bot|assistant))?\W*$",
+    re.IGNORECASE)
+# requests about the previous answer itself, nothing new has to be looked up
+FOLLOW_UP = re.compile(
+    r"^\W*(can you |could you |please )*(rephrase|reword|shorten|simplify|summari[sz]e|translate|repeat|explain|elaborate on)"
+    r"( (that|it|this|the above|your (last )?(answer|response)))?"
+    r"( (again|more simply|simpler|shorter|in simpler terms|in \w+( \w+)?))?\W*$"
+    r"|^\W*(make it|in) (shorter|simpler|bullet points|one sentence)\W*$"
+    r"|^\W*what did (you|i) (just )?(say|ask)",
+    re.IGNORECASE)
+# questions that need more than a couple of chunks
+BROAD = re.compile(r"\b(compare|comparison|difference|differences|versus|vs\.?|list all|all the|overview|summari[sz]e the)\b",
+                   re.IGNORECASE)
+
+
+@dataclass
+class RouteDecision:
+    """What the router decided for one query, stored in the graph state as a dict.
+
+    action   "retrieve" or "skip" (answer from the conversation alone)
+    stores   vectorstore paths to search, first one is the thread's store when it was kept
+    k        dense / sparse candidates per store (None = the store's fusion.json)
+    rerank   False for shallow lookups, the fused order is used as is
+    """
+    action: str = RETRIEVE
+    reason: str = "default"
+    stores: list = field(default_factory=list)
+    k: int = None
+    rerank: bool = True
+    scores: dict = field(default_factory=dict)   # {vectorstore_path: centroid similarity}
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class QueryRouter:
+    """Cheap per query routing before retrieval, one (cached) query embedding and a few dot products.
+
+    - chit-chat ("thanks", "hello") and follow-ups about the previous answer skip retrieval
+    - stores are picked by centroid similarity among the candidates: the thread's store unless another one is
+      clearly closer, plus the stores about as close as the best one (up to ROUTER_MAX_STORES).
+      Stores the caller asked for explicitly (fixed_stores) are all searched, never narrowed
+    - depth: short keyword lookups get ROUTER_SHALLOW_K without rerank, broad / multi part
+      questions and multi store routes ROUTER_DEEP_K, everything else the store defaults
+    """
+
+    def __init__(self, embeddings, store_cache):
+        self.embeddings = embeddings
+        self.store_cache = store_cache
+
+    def store_scores(self, query_vector, paths: list[str]) -> dict:
+        scores = {}
+        for path in paths:
+            try:
+                centroids = self.store_cache.get(path).centroids
+            except FileNotFoundError:
+                continue   # a predefined store that was never built
+            if centroids is not None:
+                scores[path] = round(centroids.similarity(query_vector), 4)
+        return scores
+
+    @staticmethod
+    def pick_stores(primary: str, scores: dict) -> list[str]:
+        if not scores:
+            return [primary]
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        best = ranked[0]
+        if primary in scores and scores[best] - scores[primary] < ROUTER_SWITCH_MARGIN:
+            best = primary
+        close = [path for path in ranked if path != best and scores[path] >= scores[best] - ROUTER_STORE_MARGIN]
+        return [best] + close[:ROUTER_MAX_STORES - 1]
+
+    @staticmethod
+    def depth(query: str, stores: list[str], short_query_tokens: int = 6) -> tuple:
+        """(k, rerank, reason) for the query"""
+        words = query.split()
+        if len(stores) > 1 or BROAD.search(query) or query.count("?") > 1:
+            return ROUTER_DEEP_K, True, "broad"
+        if len(words) < short_query_tokens and "?" not in query:
+            return ROUTER_SHALLOW_K, False, "lookup"
+        return None, True, "question"
+
+    def route(self, query: str, primary: str, candidates: list[str] = None, fixed_stores: list[str] = None,
+              has_history: bool = False) -> RouteDecision:
+        """candidates: stores the router may pick from (default only primary), fixed_stores: searched as given"""
+        if CHIT_CHAT.match(query):
+            return RouteDecision(action=SKIP, reason="chit_chat")
+        if has_history and FOLLOW_UP.search(query):
+            return RouteDecision(action=SKIP, reason="follow_up")
+
+        if fixed_stores:
+            stores, scores = list(fixed_stores), {}
+        else:
+            query_vector = self.embeddings.embed_query(query)   # cached, retrieval reuses it
+            scores = self.store_scores(query_vector, candidates or [primary])
+            stores = self.pick_stores(primary, scores)
+        k, rerank, reason = self.depth(query, stores, self.store_cache.get(stores[0]).fusion.short_query_tokens)
+        return RouteDecision(reason=reason, stores=stores, k=k, rerank=rerank, scores=scores)
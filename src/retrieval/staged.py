@@ -0,0 +1,128 @@
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as StageTimeout
+from dataclasses import dataclass, field
+
+from langchain_community.document_transformers import LongContextReorder
+
+from src.rerank.rerankers import candidate_key
+from src.retrieval.hybrid import documents_for_ids, weighted_rrf
+from src.vectorstore.redundancy import FaissRedundantFilter
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_BUDGET_MS = float(os.getenv("RETRIEVAL_BUDGET_MS", "0"))   # 0 -> no budget, always the full chain
+DENSE_CONFIDENCE_MARGIN = float(os.getenv("DENSE_CONFIDENCE_MARGIN", "0.08"))
+# longest share of the budget a stage may take before its best results so far are used instead
+STAGE_SLICES = {"sparse": 0.2, "rerank": 0.6}
+
+# stage calls run here so the node can stop waiting on them, an overrun call that already started finishes in the
+# background (queued ones are cancelled, and a stage that starts after its deadline does not call the backend)
+_stage_executor = ThreadPoolExecutor(max_workers=int(os.getenv("RETRIEVAL_STAGE_WORKERS", "8")),
+                                     thread_name_prefix="retrieval-stage")
+
+
+@dataclass
+class StagedResult:
+    documents: list
+    stages: list = field(default_factory=list)   # [{"stage", "status", "ms"}] in the order they ran
+
+
+class StagedRetriever:
+    """Retrieval as explicit stages under a per request latency budget.
+
+    dense   FAISS top k with relevance scores (always runs, nothing to fall back to)
+    sparse  BM25 top k fused with dense by weighted reciprocal rank, dense only on overrun
+    rerank  reranker over the fused candidates, skipped when the dense top_n is clearly ahead of the rest
+            (score gap at the top_n boundary >= confidence_margin), fused order on skip, overrun or error
+    filter  redundancy filter + LongContextReorder (local, cheap)
+
+    Every stage is recorded as done / skipped / timeout / error with its duration.
+    """
+
+    def __init__(self, loaded_store, reranker, embeddings, budget_ms: float, top_n: int = 3,
+                 confidence_margin: float = DENSE_CONFIDENCE_MARGIN):
+        self.loaded_store = loaded_store
+        self.reranker = reranker
+        self.embeddings = embeddings
+        self.budget_ms = budget_ms
+        self.fusion = loaded_store.fusion   # k per side, rrf_k and weights of this store
+        self.top_n = top_n
+        self.confidence_margin = confidence_margin
+
+    def _remaining_ms(self, started: float) -> float:
+        return self.budget_ms - (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _record(stages: list, name: str, status: str, start: float):
+        stages.append({"stage": name, "status": status, "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+    def _run_stage(self, stages: list, name: str, fn, fallback, started: float):
+        """Run fn in the stage pool, wait at most its slice of the (remaining) budget"""
+        start = time.perf_counter()
+        timeout = max(0.0, min(STAGE_SLICES[name] * self.budget_ms, self._remaining_ms(started))) / 1000
+        deadline = start + timeout
+
+        def guarded():
+            # waited in the queue past the deadline, nobody will use the result
+            if time.perf_counter() >= deadline:
+                raise StageTimeout()
+            return fn()
+
+        future = _stage_executor.submit(contextvars.copy_context().run, guarded)   # keeps the request trace
+        try:
+            result, status = future.result(timeout=timeout), "done"
+        except StageTimeout:
+            future.cancel()
+            result, status = fallback, "timeout"
+        except Exception as e:
+            logger.warning(f"Retrieval stage {name} failed, using the results so far: {e}")
+            result, status = fallback, "error"
+        self._record(stages, name, status, start)
+        return result
+
+    def _fuse(self, query: str, dense_docs: list, sparse_hits: list) -> list:
+        """Weighted reciprocal rank fusion of the dense documents and the BM25 (doc_id, score) hits"""
+        dense_ids = [candidate_key(doc) for doc in dense_docs]
+        fused_ids, _ = weighted_rrf([dense_ids, [doc_id for doc_id, _ in sparse_hits]],
+                                    self.fusion.weights(query), rrf_k=self.fusion.rrf_k)
+        return documents_for_ids(self.loaded_store.dense.docstore, fused_ids.tolist(),
+                                 known=dict(zip(dense_ids, dense_docs)))
+
+    def is_confident(self, relevance: list[float]) -> bool:
+        if len(relevance) <= self.top_n:
+            return True
+        return relevance[self.top_n - 1] - relevance[self.top_n] >= self.confidence_margin
+
+    def retrieve(self, query: str, k: int = None, rerank: bool = True) -> StagedResult:
+        """k: candidates per side (None = the store's fusion.json), rerank=False skips the rerank stage"""
+        started = time.perf_counter()
+        stages = []
+
+        start = time.perf_counter()
+        hits = self.loaded_store.dense.similarity_search_with_relevance_scores(query, k=k or self.fusion.dense_k)
+        dense_docs = [doc for doc, _ in hits]
+        self._record(stages, "dense", "done", start)
+
+        fused = self._run_stage(
+            stages, "sparse",
+            lambda: self._fuse(query, dense_docs, self.loaded_store.sparse.search(query, k=k or self.fusion.sparse_k)),
+            fallback=dense_docs, started=started)
+
+        if not rerank or self.is_confident([score for _, score in hits]):
+            # shallow route, or the dense ranking is already decisive: reranking would not change the top_n
+            candidates = fused[:self.top_n]
+            stages.append({"stage": "rerank", "status": "skipped", "ms": 0.0})
+        else:
+            candidates = self._run_stage(
+                stages, "rerank",
+                lambda: list(self.reranker.compress_documents(fused, query)),
+                fallback=fused[:self.top_n], started=started)
+
+        start = time.perf_counter()
+        redundancy = FaissRedundantFilter(loaded_store=self.loaded_store, embeddings=self.embeddings)
+        documents = LongContextReorder().transform_documents(redundancy.transform_documents(candidates))
+        self._record(stages, "filter", "done", start)
+        return StagedResult(documents=list(documents), stages=stages)
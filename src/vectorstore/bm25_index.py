@@ -0,0 +1,124 @@
+import os
+import re
+
+import numpy as np
+
+# saved next to index.faiss / chunks.sqlite
+BM25_FILE = "bm25.npz"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 sparse index stored as flat numpy arrays.
+
+    On disk it is only token-id postings + document lengths + the FAISS docstore ids (no pickled Documents),
+    the documents themselves are looked up in the chunk store that sits in the same folder.
+    """
+
+    def __init__(self, vocab, offsets, postings_docs, postings_tf, doc_lens, doc_ids, k1=1.5, b=0.75):
+        self.vocab = vocab                  # {token: token_id}
+        self.offsets = offsets              # postings of token t are [offsets[t]:offsets[t+1]]
+        self.postings_docs = postings_docs  # doc position for each posting
+        self.postings_tf = postings_tf      # term frequency for each posting
+        self.doc_lens = doc_lens
+        self.doc_ids = doc_ids              # FAISS docstore id for each doc position
+        self.k1 = k1
+        self.b = b
+        n_docs = len(doc_lens)
+        self.avg_len = float(doc_lens.mean()) if n_docs else 0.0
+        df = np.diff(offsets).astype(np.float32)
+        self.idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts: list[str], doc_ids: list[str], **kwargs) -> "BM25Index":
+        vocab = {}
+        term_docs = []   # per token id: list of (doc_position, tf)
+        doc_lens = np.zeros(len(texts), dtype=np.int32)
+        for position, text in enumerate(texts):
+            counts = {}
+            tokens = tokenize(text)
+            doc_lens[position] = len(tokens)
+            for token in tokens:
+                token_id = vocab.setdefault(token, len(vocab))
+                counts[token_id] = counts.get(token_id, 0) + 1
+            for token_id, tf in counts.items():
+                while len(term_docs) <= token_id:
+                    term_docs.append([])
+                term_docs[token_id].append((position, tf))
+
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings) for postings in term_docs])
+        postings_docs = np.empty(offsets[-1], dtype=np.int32)
+        postings_tf = np.empty(offsets[-1], dtype=np.int32)
+        for token_id, postings in enumerate(term_docs):
+            start, end = offsets[token_id], offsets[token_id + 1]
+            postings_docs[start:end] = [position for position, _ in postings]
+            postings_tf[start:end] = [tf for _, tf in postings]
+        return cls(vocab, offsets, postings_docs, postings_tf, doc_lens,
+                   np.array(doc_ids, dtype=str), **kwargs)
+
+    @classmethod
+    def from_vector_store(cls, vector_store, **kwargs) -> "BM25Index":
+        """Build the index from a FAISS store that was saved without one (older/predefined stores)"""
+        docstore = vector_store.docstore
+        if hasattr(docstore, "iter_rows"):
+            # SQLiteChunkStore: one scan instead of one query per chunk
+            rows = [(doc_id, page_content) for _, doc_id, page_content, _ in docstore.iter_rows()]
+            doc_ids = [doc_id for doc_id, _ in rows]
+            texts = [page_content for _, page_content in rows]
+        else:
+            doc_ids = [vector_store.index_to_docstore_id[i] for i in range(len(vector_store.index_to_docstore_id))]
+            texts = [docstore.search(doc_id).page_content for doc_id in doc_ids]
+        return cls.build(texts, doc_ids, **kwargs)
+
+    def save(self, folder_path: str):
+        tokens = np.array(sorted(self.vocab, key=self.vocab.get), dtype=str)
+        np.savez(os.path.join(folder_path, BM25_FILE),
+                 tokens=tokens,
+                 offsets=self.offsets,
+                 postings_docs=self.postings_docs,
+                 postings_tf=self.postings_tf,
+                 doc_lens=self.doc_lens,
+                 doc_ids=self.doc_ids,
+                 params=np.array([self.k1, self.b], dtype=np.float32))
+
+    @classmethod
+    def load(cls, folder_path: str) -> "BM25Index":
+        with np.load(os.path.join(folder_path, BM25_FILE), allow_pickle=False) as data:
+            vocab = {token: token_id for token_id, token in enumerate(data["tokens"].tolist())}
+            k1, b = data["params"].tolist()
+            return cls(vocab, data["offsets"], data["postings_docs"], data["postings_tf"],
+                       data["doc_lens"], data["doc_ids"], k1=k1, b=b)
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        return os.path.exists(os.path.join(folder_path, BM25_FILE))
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.doc_lens), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lens / max(self.avg_len, 1e-9))
+        for token in tokenize(query):
+            token_id = self.vocab.get(token)
+            if token_id is None:
+                continue
+            start, end = self.offsets[token_id], self.offsets[token_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            scores[docs] += self.idf[token_id] * tf * (self.k1 + 1) / (tf + norm[docs])
+        return scores
+
+    def search(self, query: str, k: int = 5) -> list[tuple[str, float]]:
+        """Return [(docstore_id, score)] of the k best matching documents"""
+        scores = self.scores(query)
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(str(self.doc_ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
@@ -0,0 +1,67 @@
+import os
+
+import faiss
+import numpy as np
+
+# saved next to index.faiss at ingest, used by the query router to pick stores without searching them
+CENTROIDS_FILE = "centroids.npy"
+
+STORE_CENTROIDS = int(os.getenv("STORE_CENTROIDS", "8"))            # topics kept per store
+CENTROID_SAMPLE = int(os.getenv("CENTROID_SAMPLE", "20000"))       # max vectors read back from the index
+
+
+def unit_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def sample_vectors(index, max_vectors: int = CENTROID_SAMPLE) -> np.ndarray:
+    """Up to max_vectors stored vectors, evenly spread over the index.
+    IVF indexes without a direct map can not give vectors back, their coarse centroids (biggest lists first) are used.
+    """
+    rows = np.unique(np.linspace(0, index.ntotal - 1, min(index.ntotal, max_vectors)).astype(np.int64))
+    try:
+        return index.reconstruct_batch(rows)
+    except RuntimeError:
+        ivf = faiss.extract_index_ivf(index)
+        sizes = np.array([ivf.invlists.list_size(i) for i in range(ivf.nlist)])
+        lists = np.argsort(-sizes)[:int((sizes > 0).sum())]
+        return ivf.quantizer.reconstruct_n(0, ivf.nlist)[lists]
+
+
+class StoreCentroids:
+    """A few unit vectors summarising what one store is about (k-means over its chunk embeddings).
+
+    similarity(query) is the best cosine between the query embedding and any centroid, so a store covering
+    several topics still matches a query about one of them.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = unit_rows(vectors)   # (n_centroids, dim)
+
+    @classmethod
+    def from_index(cls, index, n_centroids: int = STORE_CENTROIDS) -> "StoreCentroids":
+        vectors = np.ascontiguousarray(sample_vectors(index), dtype=np.float32)
+        # k-means wants a few dozen points per centroid, small stores get fewer (or just the mean)
+        k = min(n_centroids, len(vectors) // 40)
+        if k <= 1:
+            return cls(vectors.mean(axis=0, keepdims=True))
+        kmeans = faiss.Kmeans(vectors.shape[1], k, niter=20, seed=0)
+        kmeans.train(unit_rows(vectors))
+        return cls(kmeans.centroids)
+
+    def similarity(self, query_vector) -> float:
+        query = unit_rows(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+        return float((self.vectors @ query).max())
+
+    def save(self, folder_path: str):
+        np.save(os.path.join(folder_path, CENTROIDS_FILE), self.vectors)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "StoreCentroids":
+        return cls(np.load(os.path.join(folder_path, CENTROIDS_FILE), allow_pickle=False))
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        return os.path.exists(os.path.join(folder_path, CENTROIDS_FILE))
@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+try:
+    import fcntl
+except ImportError:   # windows, no cross process store lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# replaces the pickled docstore (index.pkl) of FAISS.save_local
+CHUNK_STORE_FILE = "chunks.sqlite"
+INDEX_FILE = "index.faiss"
+PICKLE_FILE = "index.pkl"
+LOCK_FILE = ".store.lock"
+
+
+@contextmanager
+def store_lock(folder_path: str, exclusive: bool):
+    """Cross process lock of a store folder.
+    save_store swaps index.faiss and chunks.sqlite under the exclusive lock, load_store opens both under the shared
+    one, so a loader never pairs a new docstore with an old index.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(folder_path, LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SQLiteChunkStore(Docstore):
+    """Read only docstore backed by chunks.sqlite, chunks are read on demand by id.
+
+    Nothing is held in memory besides the SQLite page cache, so every uvicorn worker shares the OS file cache
+    instead of keeping its own unpickled copy of the whole docstore.
+
+    The file is opened once here (one connection shared by all threads). A save that replaces chunks.sqlite later
+    does not change what this store reads, it keeps the file it was loaded with next to its index. The connection is
+    closed by close() or when the store is dropped (evicted from the cache and no request holds it anymore).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._connection.execute("PRAGMA schema_version").fetchone()   # open the file now, not on first query
+        self._finalizer = weakref.finalize(self, self._connection.close)
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._finalizer()
+
+    @staticmethod
+    def _document(doc_id, page_content, metadata) -> Document:
+        metadata = json.loads(metadata)
+        metadata["docstore_id"] = doc_id   # rerankers drop doc.id, the redundancy filter reads it from here
+        return Document(id=doc_id, page_content=page_content, metadata=metadata)
+
+    def search(self, search: str):
+        rows = self._query("SELECT doc_id, page_content, metadata FROM chunks WHERE doc_id=?", (search,))
+        if not rows:
+            return f"ID {search} not found."   # same contract as InMemoryDocstore
+        return self._document(*rows[0])
+
+    def mget(self, doc_ids: list[str]) -> list[Document]:
+        """Documents for many ids in one query, in the same order (missing ids are skipped)"""
+        if not doc_ids:
+            return []
+        placeholders = ",".join("?" * len(doc_ids))
+        rows = self._query(f"SELECT doc_id, page_content, metadata FROM chunks WHERE doc_id IN ({placeholders})", doc_ids)
+        found = {row[0]: self._document(*row) for row in rows}
+        return [found[doc_id] for doc_id in doc_ids if doc_id in found]
+
+    def doc_id(self, row: int):
+        found = self._query("SELECT doc_id FROM chunks WHERE row=?", (int(row),))
+        return found[0][0] if found else None
+
+    def doc_ids(self, rows) -> dict:
+        """{row: doc_id} for many FAISS rows in one query (rows not in the store are left out)"""
+        rows = [int(row) for row in rows]
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        return dict(self._query(f"SELECT row, doc_id FROM chunks WHERE row IN ({placeholders})", rows))
+
+    def row(self, doc_id: str):
+        found = self._query("SELECT row FROM chunks WHERE doc_id=?", (doc_id,))
+        return found[0][0] if found else None
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM chunks")[0][0]
+
+    def iter_rows(self, batch_size: int = 1000):
+        """(row, doc_id, page_content, metadata) for every chunk in index order, read in batches so the shared
+        connection is not held while the caller works"""
+        last_row = -1
+        while True:
+            batch = self._query("SELECT row, doc_id, page_content, metadata FROM chunks WHERE row>? ORDER BY row LIMIT ?",
+                                (last_row, batch_size))
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_row = batch[-1][0]
+
+    def add(self, texts: dict):
+        raise NotImplementedError("SQLiteChunkStore is read only, update stores through GraphNodes.update_vector_store")
+
+    def delete(self, ids: list):
+        raise NotImplementedError("SQLiteChunkStore is read only, update stores through GraphNodes.update_vector_store")
+
+
+class RowToDocId(Mapping):
+    """FAISS row -> docstore id, looked up in SQLite (stands in for FAISS.index_to_docstore_id)"""
+
+    def __init__(self, chunk_store: SQLiteChunkStore):
+        self.chunk_store = chunk_store
+
+    def __getitem__(self, row):
+        doc_id = self.chunk_store.doc_id(row)
+        if doc_id is None:
+            raise KeyError(row)
+        return doc_id
+
+    def __len__(self):
+        return len(self.chunk_store)
+
+    def __iter__(self):
+        for row, *_ in self.chunk_store.iter_rows():
+            yield row
+
+
+class DocIdToRow(Mapping):
+    """docstore id -> FAISS row, looked up in SQLite"""
+
+    def __init__(self, chunk_store: SQLiteChunkStore):
+        self.chunk_store = chunk_store
+
+    def __getitem__(self, doc_id):
+        row = self.chunk_store.row(doc_id) if doc_id is not None else None
+        if row is None:
+            raise KeyError(doc_id)
+        return row
+
+    def __len__(self):
+        return len(self.chunk_store)
+
+    def __iter__(self):
+        for _, doc_id, *_ in self.chunk_store.iter_rows():
+            yield doc_id
+
+
+def write_chunk_store(folder_path: str, vector_store: FAISS):
+    """Write the docstore of vector_store to chunks.sqlite (written to a temp file then renamed in place)"""
+    tmp_path = write_chunk_db(folder_path, vector_store)
+    with store_lock(folder_path, exclusive=True):
+        os.replace(tmp_path, os.path.join(folder_path, CHUNK_STORE_FILE))
+
+
+def write_chunk_db(folder_path: str, vector_store: FAISS) -> str:
+    """Write the docstore of vector_store to a temp file next to chunks.sqlite, returns its path"""
+    tmp_path = f"{os.path.join(folder_path, CHUNK_STORE_FILE)}.{os.getpid()}.tmp"   # per process, several workers may migrate the same store
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("""CREATE TABLE chunks (
+                            row INTEGER PRIMARY KEY,
+                            doc_id TEXT NOT NULL UNIQUE,
+                            page_content TEXT NOT NULL,
+                            metadata TEXT NOT NULL)""")
+        rows = []
+        for row, doc_id in vector_store.index_to_docstore_id.items():
+            doc = vector_store.docstore.search(doc_id)
+            metadata = {key: value for key, value in doc.metadata.items() if key != "docstore_id"}
+            rows.append((int(row), doc_id, doc.page_content, json.dumps(metadata, default=str)))
+        conn.executemany("INSERT INTO chunks (row, doc_id, page_content, metadata) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return tmp_path
+
+
+def save_store(folder_path: str, vector_store: FAISS):
+    """Save the FAISS index + chunks.sqlite, no pickle.
+    Both are written to temp files first and swapped in together under the store lock.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    index_path = os.path.join(folder_path, INDEX_FILE)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    faiss.write_index(vector_store.index, tmp_path)
+    chunks_tmp_path = write_chunk_db(folder_path, vector_store)
+    with store_lock(folder_path, exclusive=True):
+        os.replace(chunks_tmp_path, os.path.join(folder_path, CHUNK_STORE_FILE))
+        os.replace(tmp_path, index_path)
+    # the old pickled docstore is not used anymore
+    if os.path.exists(os.path.join(folder_path, PICKLE_FILE)):
+        os.remove(os.path.join(folder_path, PICKLE_FILE))
+
+
+def migrate_pickle_store(folder_path: str, embeddings):
+    """One time conversion of a FAISS.save_local store (index.pkl) to chunks.sqlite"""
+    logger.info(f"Migrating pickled docstore to {CHUNK_STORE_FILE}: {folder_path}")
+    vector_store = FAISS.load_local(folder_path=folder_path, embeddings=embeddings,
+                                    allow_dangerous_deserialization=True)
+    write_chunk_store(folder_path, vector_store)
+
+
+# IO_FLAG_MMAP only maps IVF inverted lists. Flat codes (flat / HNSW / PQ storage) are only mapped with
+# IO_FLAG_MMAP_IFC (faiss >= 1.8), without it every worker reads its own copy of those indexes into memory.
+MMAP_FLAT_CODES = hasattr(faiss, "IO_FLAG_MMAP_IFC")
+if not MMAP_FLAT_CODES:
+    logger.warning(f"faiss {faiss.__version__} has no IO_FLAG_MMAP_IFC, flat indexes are not shared between workers "
+                   f"(only IVF lists are memory mapped), upgrade faiss to >= 1.8 to share them")
+
+
+def read_index(index_path: str, mmap: bool):
+    """Read a saved index. mmap=True maps what this faiss version can map (see MMAP_FLAT_CODES) read only."""
+    if mmap:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        if MMAP_FLAT_CODES:
+            flags |= faiss.IO_FLAG_MMAP_IFC
+        try:
+            return faiss.read_index(index_path, flags)
+        except RuntimeError as e:
+            logger.warning(f"Index can not be memory mapped, reading it into memory: {index_path} ({e})")
+    return faiss.read_index(index_path)
+
+
+def load_store(folder_path: str, embeddings, mmap: bool = True) -> FAISS:
+    """Load a saved store.
+
+    mmap=True   serving: index memory mapped read only, chunks read from SQLite on demand
+    mmap=False  editing (incremental updates): index and chunks fully in memory, can add/delete
+    """
+    if not os.path.exists(os.path.join(folder_path, CHUNK_STORE_FILE)):
+        migrate_pickle_store(folder_path, embeddings)
+    with store_lock(folder_path, exclusive=False):
+        # the memory map and the connection keep reading these files even after a later save replaced them
+        index = read_index(os.path.join(folder_path, INDEX_FILE), mmap=mmap)
+        chunk_store = SQLiteChunkStore(os.path.join(folder_path, CHUNK_STORE_FILE))
+    if mmap:
+        return FAISS(embedding_function=embeddings, index=index, docstore=chunk_store,
+                     index_to_docstore_id=RowToDocId(chunk_store))
+
+    documents, index_to_docstore_id = {}, {}
+    for row, doc_id, page_content, metadata in chunk_store.iter_rows():
+        documents[doc_id] = Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata))
+        index_to_docstore_id[row] = doc_id
+    chunk_store.close()
+    return FAISS(embedding_function=embeddings, index=index, docstore=InMemoryDocstore(documents),
+                 index_to_docstore_id=index_to_docstore_id)
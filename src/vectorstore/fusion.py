@@ -0,0 +1,46 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+
+# optional, saved next to index.faiss to tune hybrid search of one store (defaults are used without it)
+FUSION_FILE = "fusion.json"
+
+
+@dataclass
+class FusionParams:
+    """How the dense (FAISS) and sparse (BM25) results of one store are fused with weighted reciprocal rank.
+
+    Short queries (medical terms, section numbers) lean more on BM25, natural language questions on FAISS.
+    """
+    dense_k: int = 5
+    sparse_k: int = 5
+    rrf_k: int = 60
+    short_query_tokens: int = 6           # queries with fewer words use short_weights
+    short_weights: tuple = (0.6, 0.4)     # (dense, sparse)
+    long_weights: tuple = (0.85, 0.15)
+
+    def weights(self, query: str) -> tuple:
+        return tuple(self.short_weights if len(query.split()) < self.short_query_tokens else self.long_weights)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FusionParams":
+        data = dict(data or {})
+        for key in ("short_weights", "long_weights"):
+            if key in data:
+                data[key] = tuple(data[key])
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def save(self, folder_path: str):
+        with open(os.path.join(folder_path, FUSION_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "FusionParams":
+        path = os.path.join(folder_path, FUSION_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
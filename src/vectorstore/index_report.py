@@ -0,0 +1,126 @@
+"""Recall vs latency of approximate indexes against flat (exact) search on the same queries.
+
+Usage:
+    python -m src.vectorstore.index_report --store ./vectorstores/Legal --kinds ivf_flat ivf_pq hnsw --k 5
+    python -m src.vectorstore.index_report --store ./vectorstores/Legal --queries questions.txt --nprobe 8 32
+"""
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+from src.vectorstore.chunk_store import CHUNK_STORE_FILE, INDEX_FILE, SQLiteChunkStore
+from src.vectorstore.index_spec import FLAT, HNSW, INDEX_KINDS, IndexSpec
+
+
+def search_timed(index, queries: np.ndarray, k: int):
+    """Search one query at a time (like serving does), returns (ids, per query latency in ms)"""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries), dtype=np.float64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids[i] = index.search(query[None, :], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return ids, latencies
+
+
+def recall_at_k(exact_ids: np.ndarray, approx_ids: np.ndarray) -> float:
+    k = exact_ids.shape[1]
+    hits = [len(set(exact) & set(approx)) for exact, approx in zip(exact_ids, approx_ids)]
+    return float(np.mean(hits)) / k
+
+
+def recall_latency_report(vectors: np.ndarray, queries: np.ndarray, specs: list[IndexSpec], k: int = 5) -> list[dict]:
+    """Build every spec over the same vectors and compare it with flat search.
+    Returns one row per spec: recall@k, mean / p95 latency, build time and index size in memory.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    exact_ids, flat_latencies = search_timed(flat, queries, k)
+
+    rows = [{"spec": FLAT, "recall": 1.0, "mean_ms": flat_latencies.mean(),
+             "p95_ms": np.percentile(flat_latencies, 95), "build_s": 0.0,
+             "size_mb": faiss.serialize_index(flat).nbytes / 1e6}]
+    for spec in specs:
+        start = time.perf_counter()
+        index = spec.build_index(vectors)
+        index.add(vectors)
+        spec.apply_search_params(index)
+        build_s = time.perf_counter() - start
+        approx_ids, latencies = search_timed(index, queries, k)
+        label = spec.kind
+        if spec.kind == HNSW:
+            label += f" efSearch={spec.ef_search}"
+        elif spec.kind != FLAT:
+            label += f" nprobe={spec.nprobe}"
+        rows.append({"spec": label, "recall": recall_at_k(exact_ids, approx_ids),
+                     "mean_ms": latencies.mean(), "p95_ms": np.percentile(latencies, 95),
+                     "build_s": build_s, "size_mb": faiss.serialize_index(index).nbytes / 1e6})
+    return rows
+
+
+def store_vectors(store: str) -> np.ndarray:
+    """The store's vectors in index order, the ground truth of the report.
+    PQ codes are lossy: flat search over their reconstructions is not exact search, so ivf_pq stores are
+    embedded again from chunks.sqlite (cheap, the embedding cache already holds them).
+    """
+    spec = IndexSpec.load(store)
+    if spec.lossy:
+        from src.agent.model_loader import EMBEDDER
+        chunk_store = SQLiteChunkStore(os.path.join(store, CHUNK_STORE_FILE))
+        texts = [page_content for _, _, page_content, _ in chunk_store.iter_rows()]
+        chunk_store.close()
+        print(f"{spec.kind} store, embedding {len(texts)} chunks again for the exact baseline")
+        return np.asarray(EMBEDDER.embed_documents(texts), dtype=np.float32)
+
+    index = faiss.read_index(os.path.join(store, INDEX_FILE))
+    # IVF indexes need a direct map before vectors can be read back, the saved spec sets one up
+    spec.apply_search_params(index)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def format_report(rows: list[dict], k: int) -> str:
+    lines = [f"{'index':<28}{'recall@' + str(k):>10}{'mean ms':>10}{'p95 ms':>10}{'build s':>10}{'size MB':>10}"]
+    for row in rows:
+        lines.append(f"{row['spec']:<28}{row['recall']:>10.3f}{row['mean_ms']:>10.3f}{row['p95_ms']:>10.3f}"
+                     f"{row['build_s']:>10.2f}{row['size_mb']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of ANN indexes against flat search")
+    parser.add_argument("--store", required=True, help="vectorstore folder (index.faiss)")
+    parser.add_argument("--kinds", nargs="+", default=[kind for kind in INDEX_KINDS if kind != FLAT])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", help="text file with one question per line (embedded with EMBEDDER)")
+    parser.add_argument("--n-queries", type=int, default=200, help="stored vectors used as queries when --queries is not given")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[128])
+    args = parser.parse_args()
+
+    vectors = store_vectors(args.store)
+
+    if args.queries:
+        from src.agent.model_loader import EMBEDDER
+        with open(args.queries, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        queries = np.asarray([EMBEDDER.embed_query(question) for question in questions], dtype=np.float32)
+    else:
+        rows = np.random.default_rng(0).choice(len(vectors), min(args.n_queries, len(vectors)), replace=False)
+        queries = vectors[rows]
+
+    specs = []
+    for kind in args.kinds:
+        if kind == HNSW:
+            specs += [IndexSpec(kind=kind, ef_search=ef) for ef in args.ef_search]
+        else:
+            specs += [IndexSpec(kind=kind, nprobe=nprobe) for nprobe in args.nprobe]
+    print(format_report(recall_latency_report(vectors, queries, specs, k=args.k), args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import logging
+import math
+import os
+from dataclasses import asdict, dataclass
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# saved next to index.faiss so loading knows how to tune the index for search
+INDEX_SPEC_FILE = "index_spec.json"
+
+FLAT, IVF_FLAT, IVF_PQ, HNSW = "flat", "ivf_flat", "ivf_pq", "hnsw"
+INDEX_KINDS = (FLAT, IVF_FLAT, IVF_PQ, HNSW)
+
+
+@dataclass
+class IndexSpec:
+    """Which FAISS index a store is built with.
+
+    flat      exact search, full float32 vectors (default, same as FAISS.from_documents)
+    ivf_flat  inverted lists, searches nprobe of nlist clusters
+    ivf_pq    inverted lists + product quantization (pq_m bytes per vector with pq_bits=8), smallest in RAM
+    hnsw      graph index, efSearch controls recall/latency, does not support deleting vectors
+
+    Only flat stores are updated in place. IVF remove_ids keeps the ids of the surviving vectors while
+    FAISS.delete renumbers index_to_docstore_id, so the next add would hand out ids that are still in use.
+    """
+    kind: str = FLAT
+    nlist: int = None            # IVF clusters, default 4 * sqrt(n)
+    nprobe: int = 16             # IVF clusters searched per query
+    pq_m: int = 64               # PQ sub-quantizers (must divide the vector dimension)
+    pq_bits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 128
+    train_sample: int = 100_000  # max vectors used to train IVF / PQ
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind: {self.kind}, expected one of {INDEX_KINDS}")
+
+    @property
+    def supports_remove(self) -> bool:
+        return self.kind == FLAT
+
+    @property
+    def lossy(self) -> bool:
+        """Stored codes are compressed, vectors read back from the index are only approximations"""
+        return self.kind == IVF_PQ
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndexSpec":
+        return cls(**(data or {}))
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def save(self, folder_path: str):
+        with open(os.path.join(folder_path, INDEX_SPEC_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, folder_path: str) -> "IndexSpec":
+        """Spec saved with the store, stores built before specs existed are flat"""
+        path = os.path.join(folder_path, INDEX_SPEC_FILE)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def build_index(self, vectors: np.ndarray):
+        """Create (and train if needed) an empty FAISS index for these vectors, vectors are not added"""
+        n, dim = vectors.shape
+        if self.kind == FLAT:
+            return faiss.IndexFlatL2(dim)
+        if self.kind == HNSW:
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            index.hnsw.efConstruction = self.ef_construction
+            return index
+
+        # IVF needs at least one training vector per cluster
+        nlist = min(self.nlist or int(4 * math.sqrt(n)), n)
+        quantizer = faiss.IndexFlatL2(dim)
+        kind = self.kind
+        if kind == IVF_PQ and n < 2 ** self.pq_bits:
+            # every PQ sub-quantizer trains 2**pq_bits centroids, a short PDF does not have that many chunks
+            logger.warning(f"{n} vectors are too few to train ivf_pq (pq_bits={self.pq_bits}), using ivf_flat")
+            kind = IVF_FLAT
+        if kind == IVF_FLAT:
+            index = faiss.IndexIVFFlat(quantizer, dim, max(1, nlist))
+        else:
+            pq_m = max(m for m in range(1, min(self.pq_m, dim) + 1) if dim % m == 0)
+            index = faiss.IndexIVFPQ(quantizer, dim, max(1, nlist), pq_m, self.pq_bits)
+
+        sample = vectors
+        if n > self.train_sample:
+            rows = np.random.default_rng(0).choice(n, self.train_sample, replace=False)
+            sample = vectors[rows]
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+        return index
+
+    def apply_search_params(self, index):
+        """Set nprobe / efSearch on a loaded index, IVF also gets a direct map so stored vectors can be reconstructed"""
+        if self.kind in (IVF_FLAT, IVF_PQ):
+            ivf = faiss.extract_index_ivf(index)
+            ivf.nprobe = self.nprobe
+            # hashtable map (not array) so remove_ids keeps working on the same index
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        elif self.kind == HNSW:
+            index.hnsw.efSearch = self.ef_search
+        return index
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# saved next to index.faiss / chunks.sqlite, records which source file produced which chunks
+MANIFEST_FILE = "manifest.json"
+
+
+@lru_cache(maxsize=4096)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    # size + mtime are part of the cache key so an edited file is hashed again
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_entry(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _hash_file(path, stat.st_size, stat.st_mtime_ns)}
+
+
+@dataclass
+class ManifestDiff:
+    """What changed between the source files and what is already in the store"""
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    entries: dict = field(default_factory=dict)   # current size/mtime/hash of every source file
+    rebuild: bool = False                         # store missing (or has no manifest): build from scratch
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.rebuild or self.added or self.changed or self.removed)
+
+    @property
+    def files_to_parse(self) -> list:
+        return self.added + self.changed
+
+
+class StoreManifest:
+    """Per vectorstore manifest: {file_path: {"size", "mtime_ns", "sha256", "chunk_ids"}}"""
+
+    def __init__(self, files: dict = None):
+        self.files = files or {}
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        return os.path.exists(os.path.join(folder_path, MANIFEST_FILE))
+
+    @classmethod
+    def load(cls, folder_path: str) -> "StoreManifest":
+        if not cls.exists(folder_path):
+            return cls()
+        with open(os.path.join(folder_path, MANIFEST_FILE), encoding="utf-8") as f:
+            return cls(json.load(f)["files"])
+
+    def save(self, folder_path: str):
+        # write then rename so a crash never leaves a half written manifest
+        path = os.path.join(folder_path, MANIFEST_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(path + ".tmp", path)
+
+    def diff(self, source_files: list[str]) -> ManifestDiff:
+        diff = ManifestDiff()
+        for path in source_files:
+            old = self.files.get(path)
+            stat = os.stat(path)
+            # cheap check first, only hash when size or mtime moved
+            if old is not None and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+                diff.unchanged.append(path)
+                diff.entries[path] = {key: old[key] for key in ("size", "mtime_ns", "sha256")}
+                continue
+            entry = file_entry(path)
+            diff.entries[path] = entry
+            if old is None:
+                diff.added.append(path)
+            elif old["sha256"] != entry["sha256"]:
+                diff.changed.append(path)
+            else:
+                diff.unchanged.append(path)   # touched but same content
+        diff.removed = [path for path in self.files if path not in diff.entries]
+        return diff
+
+    def chunk_ids(self, paths: list[str]) -> list[str]:
+        return [chunk_id for path in paths for chunk_id in self.files.get(path, {}).get("chunk_ids", [])]
@@ -0,0 +1,69 @@
+from typing import Any, Sequence
+
+import numpy as np
+from langchain_core.documents import BaseDocumentTransformer, Document
+
+
+def redundant_mask(vectors: np.ndarray, similarity_threshold: float) -> np.ndarray:
+    """Return a boolean mask of the rows to keep.
+    A row is dropped when it is more similar than the threshold to an earlier kept row (same rule as EmbeddingsRedundantFilter).
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = unit @ unit.T
+    # only look at pairs (i, j) with i < j
+    redundant = np.triu(similarity > similarity_threshold, k=1)
+    keep = np.ones(len(vectors), dtype=bool)
+    for i in range(len(vectors)):
+        if keep[i]:
+            keep[redundant[i]] = False
+    return keep
+
+
+class FaissRedundantFilter(BaseDocumentTransformer):
+    """Drop near duplicate documents using the vectors already stored in the FAISS index.
+
+    Candidates are matched to index rows through their docstore id (doc.id, or metadata["docstore_id"] because
+    CohereRerank returns copies without the id), so nothing is sent to the embedding model
+    unless a document is not in the index (or the index type can not reconstruct vectors).
+    Federated results carry metadata["source_store"], their vectors come from that store when it is in stores.
+    """
+
+    def __init__(self, loaded_store, embeddings, similarity_threshold: float = 0.95, stores: dict = None):
+        self.loaded_store = loaded_store   # LoadedStore from the vectorstore cache
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.stores = stores or {}         # {vectorstore_path: LoadedStore} for federated retrieval
+
+    def _vectors(self, documents: Sequence[Document]) -> np.ndarray:
+        vectors = np.zeros((len(documents), self.loaded_store.dense.index.d), dtype=np.float32)
+
+        by_store = {}   # {id(store): (store, [row in documents])}
+        for row, doc in enumerate(documents):
+            store = self.stores.get(doc.metadata.get("source_store"), self.loaded_store)
+            by_store.setdefault(id(store), (store, []))[1].append(row)
+
+        missing = []
+        for store, doc_rows in by_store.values():
+            positions = store.positions
+            doc_ids = {row: documents[row].id or documents[row].metadata.get("docstore_id") for row in doc_rows}
+            known = [(row, positions[doc_id]) for row, doc_id in doc_ids.items() if doc_id in positions]
+            missing += [row for row, doc_id in doc_ids.items() if doc_id not in positions]
+            if known:
+                rows, ids = zip(*known)
+                try:
+                    vectors[list(rows)] = store.dense.index.reconstruct_batch(np.array(ids, dtype=np.int64))
+                except RuntimeError:
+                    # some index types (e.g. IVF without a direct map) can not give vectors back
+                    missing += list(rows)
+        if missing:
+            vectors[missing] = np.asarray(
+                self.embeddings.embed_documents([documents[row].page_content for row in missing]),
+                dtype=np.float32)
+        return vectors
+
+    def transform_documents(self, documents: Sequence[Document], **kwargs: Any) -> Sequence[Document]:
+        if len(documents) < 2:
+            return documents
+        keep = redundant_mask(self._vectors(documents), self.similarity_threshold)
+        return [doc for doc, kept in zip(documents, keep) if kept]
@@ -0,0 +1,199 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from langchain_community.vectorstores import FAISS
+
+from src.observability.metrics import REGISTRY
+from src.vectorstore.chunk_store import CHUNK_STORE_FILE, INDEX_FILE, DocIdToRow, load_store, migrate_pickle_store
+from src.vectorstore.bm25_index import BM25_FILE, BM25Index
+from src.vectorstore.index_spec import INDEX_SPEC_FILE, IndexSpec
+from src.vectorstore.fusion import FUSION_FILE, FusionParams
+from src.vectorstore.centroids import CENTROIDS_FILE, StoreCentroids
+
+logger = logging.getLogger(__name__)
+
+# files written by save_store, we watch these to know when a store changed on disk
+INDEX_FILES = (INDEX_FILE, CHUNK_STORE_FILE)
+OPTIONAL_FILES = (BM25_FILE, INDEX_SPEC_FILE, FUSION_FILE, CENTROIDS_FILE)
+
+DEFAULT_CACHE_MB = int(os.getenv("VECTORSTORE_CACHE_MB", "1024"))
+
+STORE_LOOKUPS = REGISTRY.counter("vectorstore_cache_lookups_total", "Vectorstore cache lookups by result (hit / miss)")
+STORE_EVICTIONS = REGISTRY.counter("vectorstore_cache_evictions_total", "Vectorstores evicted to stay under the size budget")
+
+
+def store_fingerprint(path: str):
+    """Return (fingerprint, size_in_bytes) of a saved vectorstore folder.
+    Fingerprint is built from mtime + size of every index file so any rewrite invalidates the cache.
+    """
+    parts = []
+    total_size = 0
+    for name in INDEX_FILES + OPTIONAL_FILES:
+        file_path = os.path.join(path, name)
+        if name in OPTIONAL_FILES and not os.path.exists(file_path):
+            continue
+        stat = os.stat(file_path)
+        parts.append((name, stat.st_mtime_ns, stat.st_size))
+        total_size += stat.st_size
+    return tuple(parts), total_size
+
+
+@dataclass
+class LoadedStore:
+    """Everything we keep in memory for one vectorstore folder"""
+    dense: FAISS
+    sparse: BM25Index
+    spec: IndexSpec = None
+    fusion: FusionParams = field(default_factory=FusionParams)
+    centroids: StoreCentroids = None            # topic centroids for query routing
+    positions: DocIdToRow = field(init=False)   # {docstore_id: row in the FAISS index}, read from chunks.sqlite
+
+    def __post_init__(self):
+        self.positions = DocIdToRow(self.dense.docstore)
+
+
+def load_or_build_sparse(path: str, vector_store: FAISS) -> BM25Index:
+    """Load the BM25 index saved beside the FAISS files, stores created before it existed get one built (and saved) once"""
+    if BM25Index.exists(path):
+        return BM25Index.load(path)
+    logger.info(f"No BM25 index found, building one from the docstore: {path}")
+    sparse = BM25Index.from_vector_store(vector_store)
+    try:
+        sparse.save(path)
+    except OSError as e:
+        logger.warning(f"Could not save BM25 index for {path}: {e}")
+    return sparse
+
+
+def load_or_build_centroids(path: str, vector_store: FAISS) -> StoreCentroids:
+    """Centroids saved at ingest, stores built before routing existed get them computed (and saved) once"""
+    if StoreCentroids.exists(path):
+        return StoreCentroids.load(path)
+    logger.info(f"No centroids found, computing them from the index: {path}")
+    centroids = StoreCentroids.from_index(vector_store.index)
+    try:
+        centroids.save(path)
+    except OSError as e:
+        logger.warning(f"Could not save centroids for {path}: {e}")
+    return centroids
+
+
+class VectorStoreCache:
+    """Process wide, thread safe LRU cache of loaded vectorstores (FAISS + BM25) keyed by vectorstore_path.
+
+    - entries are evicted (least recently used first) when the total size goes above max_bytes
+    - an entry is reloaded when the files on disk change (mtime/size fingerprint)
+    """
+
+    def __init__(self, embedding_model, max_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024):
+        self.embedding_model = embedding_model
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # {abs_path: (fingerprint, size, LoadedStore)}
+        self._lock = threading.RLock()
+        self._load_locks = {}           # one lock per path so two requests dont load the same store twice
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def _load_lock(self, key: str):
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _lookup(self, key: str, fingerprint):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                STORE_LOOKUPS.inc(result="hit")
+                return entry[2]
+        return None
+
+    def get(self, path: str) -> LoadedStore:
+        """Return the loaded store for path, loading it from disk only on first use or after it changed"""
+        key = self._key(path)
+        if not os.path.exists(os.path.join(key, INDEX_FILE)):
+            raise FileNotFoundError(f"No vectorstore at {key}")
+        if not os.path.exists(os.path.join(key, CHUNK_STORE_FILE)):
+            # store saved by FAISS.save_local, convert its pickled docstore once
+            with self._load_lock(key):
+                if not os.path.exists(os.path.join(key, CHUNK_STORE_FILE)):
+                    migrate_pickle_store(key, self.embedding_model)
+        fingerprint, _ = store_fingerprint(key)
+        loaded = self._lookup(key, fingerprint)
+        if loaded is not None:
+            return loaded
+
+        with self._load_lock(key):
+            # another thread may have loaded it while we were waiting
+            fingerprint, _ = store_fingerprint(key)
+            loaded = self._lookup(key, fingerprint)
+            if loaded is not None:
+                return loaded
+
+            logger.info(f"Loading vectorstore from disk: {key}")
+            # index memory mapped + chunks read from SQLite on demand, so workers share one copy through the OS page cache
+            vector_store = load_store(key, self.embedding_model, mmap=True)
+            # nprobe / efSearch from the spec saved with the store
+            spec = IndexSpec.load(key)
+            spec.apply_search_params(vector_store.index)
+            loaded = LoadedStore(dense=vector_store, sparse=load_or_build_sparse(key, vector_store), spec=spec,
+                                 fusion=FusionParams.load(key), centroids=load_or_build_centroids(key, vector_store))
+            # fingerprint again, building the BM25 index / centroids may have added a file. The index files keep the
+            # fingerprint from before the load, a save that raced it then reloads on the next lookup
+            after, size = store_fingerprint(key)
+            fingerprint = tuple(part for part in fingerprint if part[0] in INDEX_FILES) + \
+                tuple(part for part in after if part[0] in OPTIONAL_FILES)
+            with self._lock:
+                self.misses += 1
+                STORE_LOOKUPS.inc(result="miss")
+                self._insert(key, fingerprint, size, loaded)
+            return loaded
+
+    def _insert(self, key, fingerprint, size, loaded):
+        self._entries[key] = (fingerprint, size, loaded)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        # always keep the most recent entry even if it alone is bigger than the budget.
+        # The cache holds the only long lived reference, the store's SQLite connection is closed (SQLiteChunkStore
+        # finalizer) as soon as the requests still using it are done, never under them
+        while len(self._entries) > 1 and self.total_bytes() > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            STORE_EVICTIONS.inc()
+            logger.info(f"Evicted vectorstore from cache: {key}")
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry[1] for entry in self._entries.values())
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._entries.pop(self._key(path), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def preload(self, paths):
+        """Load stores ahead of the first query (used at backend startup). Missing stores are skipped."""
+        for path in paths:
+            try:
+                self.get(path)
+            except FileNotFoundError:
+                logger.warning(f"Vectorstore not found, skipping preload: {path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": list(self._entries.keys()),
+                    "bytes": self.total_bytes(),
+                    "max_bytes": self.max_bytes,
+                    "hits": self.hits,
+                    "misses": self.misses}